@@ -0,0 +1,573 @@
+import argparse
+import csv
+import importlib.util
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+# The projects are standalone scripts whose filenames contain spaces, so they
+# are loaded from their files rather than imported by name.
+PROJECTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_FILES = {
+    'bermudan': 'Bermudan Option Pricing Model.py',
+    'vasicek': 'Simulated Interest Rate Paths (Vasicek Model).py',
+    'iv': 'Time Series - Implied Volatility.py',
+}
+
+# The parameter grids of each benchmark. The quick grids are small enough to
+# be run before every commit, and the full grids before every release.
+GRIDS = {
+    'full': {
+        'value_estimate': {'branches': [4, 8], 'exercise_dates': [2, 4],
+                           'simulations': [20, 100]},
+        'simulate_path': {'paths': [1000, 10000], 'steps': [12, 252]},
+        'vasicek_sim': {'paths': [1000, 10000], 'steps': [12, 252]},
+        'black_scholes_iv': {'quotes': [100, 1000]},
+        'time_series_iv': {'quotes': [1000, 10000],
+                           'chunk_size': [None, 4096]},
+    },
+    'quick': {
+        'value_estimate': {'branches': [4], 'exercise_dates': [2, 3],
+                           'simulations': [20]},
+        'simulate_path': {'paths': [1000], 'steps': [12]},
+        'vasicek_sim': {'paths': [1000], 'steps': [12]},
+        'black_scholes_iv': {'quotes': [100]},
+        'time_series_iv': {'quotes': [1000], 'chunk_size': [None, 4096]},
+    },
+}
+
+# The fixed market parameters of the benchmarks
+CURRENT_PRICE = 100
+STRIKE_PRICE = 100
+INTEREST_RATE = 0.05
+VOLATILITY = 0.2
+
+
+def load_project(name):
+    """Load one of the projects as a module.
+
+    Parameters
+    ----------
+    name : str
+        The key of the project in PROJECT_FILES.
+
+    Returns
+    -------
+    module
+        The loaded project.
+    """
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(PROJECTS_DIR, PROJECT_FILES[name]))
+    module = importlib.util.module_from_spec(spec)
+    # The module is registered under its name, so that its functions can be
+    # sent to a pool of processes
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(function, *, repeats=1):
+    """Time a function and measure its peak memory.
+
+    The function is timed (without tracing memory) repeats times, keeping the
+    fastest time, and then run once more with tracemalloc to find its peak
+    memory.
+
+    Parameters
+    ----------
+    function : function
+        A function without arguments, which returns the accuracy of its
+        results as a dictionary.
+    repeats : int, optional
+        The number of timed runs, which defaults to 1.
+
+    Returns
+    -------
+    tuple
+        The fastest time (in seconds), the peak memory (in bytes) and the
+        accuracy returned by the last timed run.
+    """
+    seconds = math.inf
+    for repeat in range(repeats):
+        start_time = time.perf_counter()
+        accuracy = function()
+        seconds = min(seconds, time.perf_counter() - start_time)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak_memory, accuracy
+
+
+def grid(parameters):
+    """Yield every combination of a parameter grid.
+
+    Parameters
+    ----------
+    parameters : dict
+        The list of values of each parameter.
+
+    Yields
+    ------
+    dict
+        A value of each parameter.
+    """
+    for values in itertools.product(*parameters.values()):
+        yield dict(zip(parameters, values))
+
+
+def bench_value_estimate(bermudan, *, branches, exercise_dates, simulations,
+                         seed):
+    """Benchmark BermudanOption.value_estimate on a Bermudan put.
+
+    The accuracy is the error of the point estimate against the lattice
+    value, and whether the confidence interval contains it.
+    """
+    asset = bermudan.BlackScholesAsset('Asset', CURRENT_PRICE,
+                                       volatility=VOLATILITY)
+    option = bermudan.BermudanOption(
+        'Put', asset, option_type='put', strike_price=STRIKE_PRICE,
+        exercise_times=[k / exercise_dates
+                        for k in range(1, exercise_dates + 1)])
+    # Without Richardson extrapolation, as the oscillating error of the
+    # lattice can make it worse
+    reference = option.lattice_value(1000 * exercise_dates,
+                                     interest_rate=INTEREST_RATE,
+                                     richardson=False)
+
+    def run():
+        random.seed(seed)
+        V_min, point_estimate, V_max = option.value_estimate(
+            branches, simulations, interest_rate=INTEREST_RATE)
+        return {'reference': reference,
+                'error': float(point_estimate - reference),
+                'ci_width': float(V_max - V_min),
+                'ci_covers': bool(V_min <= reference <= V_max)}
+    nodes = simulations * sum(branches**k
+                              for k in range(exercise_dates + 1))
+    return run, nodes, 'nodes'
+
+
+def bench_simulate_path(bermudan, *, paths, steps, seed):
+    """Benchmark SimulatedAsset.simulate_path on a Black-Scholes asset.
+
+    The accuracy is the relative error of the average final price against
+    its expected value.
+    """
+    asset = bermudan.BlackScholesAsset('Asset', CURRENT_PRICE,
+                                       volatility=VOLATILITY)
+    simulated_times = [k / steps for k in range(1, steps + 1)]
+    # simulate_path simulates each price over the time given for it
+    expected = CURRENT_PRICE * math.exp(INTEREST_RATE * sum(simulated_times))
+
+    def run():
+        random.seed(seed)
+        final_prices = [list(asset.simulate_path(
+            simulated_times, interest_rate=INTEREST_RATE))[-1]
+            for path in range(paths)]
+        return {'relative_error': float(np.mean(final_prices) / expected
+                                        - 1)}
+    return run, paths * steps, 'prices'
+
+
+def bench_vasicek_sim(vasicek, *, paths, steps, seed):
+    """Benchmark vasicek_sim.
+
+    The accuracy is the error of the average final interest rate against its
+    expected value.
+    """
+    a, b, sigma, initial, final_time = 0.5, 0.04, 0.01, 0.02, 1.0
+    expected = b + (initial - b) * math.exp(-a * final_time)
+
+    def run():
+        random.seed(seed)
+        simulated = vasicek.vasicek_sim(initial, final_time, steps, paths,
+                                        a=a, b=b, sigma=sigma)
+        return {'error': float(np.mean([path[-1] for path in simulated])
+                               - expected)}
+    return run, paths * steps, 'rates'
+
+
+def _synthetic_quotes(iv, quotes, seed):
+    """Return synthetic put quotes and the volatilities used to price them.
+
+    Parameters
+    ----------
+    iv : module
+        The implied volatility project.
+    quotes : int
+        The number of quotes.
+    seed : int
+        The seed of the random number generator.
+
+    Returns
+    -------
+    dict
+        Arrays of the 'underlying' prices, maturity times in days ('dtm'),
+        interest rates in % ('int_rate'), 'volatility' and option prices
+        ('mid').
+    """
+    # The quotes are kept near the money, where every quote has an implied
+    # volatility that the solvers can find
+    rng = np.random.default_rng(seed)
+    underlying = CURRENT_PRICE * np.exp(rng.normal(0, 0.05, quotes))
+    dtm = rng.integers(30, 365, quotes)
+    int_rate = np.full(quotes, INTEREST_RATE * 100)
+    volatility = rng.uniform(0.1, 0.5, quotes)
+    mid = iv.black_scholes_greeks(STRIKE_PRICE, int_rate / 100, dtm / 365,
+                                  'put', underlying, volatility)['price']
+    return {'underlying': underlying, 'dtm': dtm, 'int_rate': int_rate,
+            'volatility': volatility, 'mid': mid}
+
+
+def bench_black_scholes_iv(iv, *, quotes, seed):
+    """Benchmark black_scholes_iv on synthetic put quotes.
+
+    The accuracy is the largest error of the implied volatilities against
+    the volatilities used to price the quotes.
+    """
+    data = _synthetic_quotes(iv, quotes, seed)
+
+    def run():
+        errors = [iv.black_scholes_iv(float(data['mid'][i]),
+                                      exercise_price=STRIKE_PRICE,
+                                      interest_rate=float(data['int_rate'][i])
+                                      / 100,
+                                      maturity_time=float(data['dtm'][i])
+                                      / 365, option_type='put',
+                                      underlying_price=float(
+                                          data['underlying'][i]))
+                  - data['volatility'][i] for i in range(quotes)]
+        return {'max_error': float(np.max(np.abs(errors)))}
+    return run, quotes, 'quotes'
+
+
+def bench_time_series_iv(iv, *, quotes, chunk_size, seed, directory):
+    """Benchmark time_series_iv on a synthetic CSV file of put quotes.
+
+    The accuracy is the largest error of the implied volatilities written to
+    the output file against the volatilities used to price the quotes.
+    """
+    data = _synthetic_quotes(iv, quotes, seed)
+    in_filename = os.path.join(directory, f'quotes_{quotes}.csv')
+    out_filename = os.path.join(directory, f'quotes_{quotes}_iv.csv')
+    if not os.path.exists(in_filename):
+        dates = np.datetime64('2015-01-01') + np.arange(quotes)
+        with open(in_filename, 'w', newline='') as input_file:
+            writer = csv.writer(input_file)
+            writer.writerow(['date', 'underlying', 'dtm', 'int_rate', 'mid'])
+            for i in range(quotes):
+                writer.writerow([
+                    dates[i].item().strftime('%d%b%Y').upper(),
+                    data['underlying'][i], data['dtm'][i],
+                    data['int_rate'][i], data['mid'][i]])
+
+    def run():
+        iv.time_series_iv(in_filename, out_filename, date_field='date',
+                          exercise_price=STRIKE_PRICE,
+                          int_rate_field='int_rate', iv_field='iv',
+                          maturity_field='dtm', option_price_field='mid',
+                          option_type='put',
+                          underlying_price_field='underlying',
+                          chunk_size=chunk_size)
+        with open(out_filename, 'r', newline='') as output_file:
+            iv_values = [float(row['iv'])
+                         for row in csv.DictReader(output_file)]
+        return {'max_error': float(np.nanmax(np.abs(
+            np.array(iv_values) - data['volatility'])))}
+    return run, quotes, 'quotes'
+
+
+def run_benchmarks(*, grid_name='quick', seed=0, repeats=1, only=None):
+    """Run the benchmarks and return their results.
+
+    Parameters
+    ----------
+    grid_name : str, optional
+        Either 'quick' or 'full', the grids of GRIDS, which defaults to
+        'quick'.
+    seed : int, optional
+        The seed of the random number generators, which defaults to 0.
+    repeats : int, optional
+        The number of timed runs of each benchmark, which defaults to 1.
+    only : list of str, optional
+        The names of the benchmarks to run, which defaults to None, where
+        every benchmark is run.
+
+    Returns
+    -------
+    dict
+        The environment and the 'results' of each benchmark and set of
+        parameters: the 'seconds', the 'throughput' (items per second) and
+        its 'unit', the 'peak_memory' (in bytes) and the 'accuracy'.
+    """
+    if grid_name not in GRIDS:
+        raise ValueError(f'{grid_name = } must be one of {list(GRIDS)}')
+    bermudan = load_project('bermudan')
+    vasicek = load_project('vasicek')
+    iv = load_project('iv')
+
+    # The synthetic CSV files are written to a temporary directory, which is
+    # removed once the benchmarks are finished
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        benchmarks = {
+            'value_estimate': lambda **params: bench_value_estimate(
+                bermudan, **params),
+            'simulate_path': lambda **params: bench_simulate_path(
+                bermudan, **params),
+            'vasicek_sim': lambda **params: bench_vasicek_sim(
+                vasicek, **params),
+            'black_scholes_iv': lambda **params: bench_black_scholes_iv(
+                iv, **params),
+            'time_series_iv': lambda **params: bench_time_series_iv(
+                iv, directory=directory, **params),
+        }
+        for name, benchmark in benchmarks.items():
+            if only is not None and name not in only:
+                continue
+            for params in grid(GRIDS[grid_name][name]):
+                run, items, unit = benchmark(seed=seed, **params)
+                seconds, peak_memory, accuracy = measure(run, repeats=repeats)
+                results.append({'benchmark': name, 'params': params,
+                                'seconds': seconds,
+                                'throughput': items / seconds, 'unit': unit,
+                                'peak_memory': peak_memory,
+                                'accuracy': accuracy})
+    return {'grid': grid_name, 'seed': seed, 'python': sys.version,
+            'numpy': np.__version__, 'platform': platform.platform(),
+            'results': results}
+
+
+def check_parallel_value_estimate(bermudan, *, seed):
+    """Check that parallel_value_estimate is exactly value_estimate.
+
+    Both a BufferedRNG and the random module are used, for puts and calls,
+    over every split level and one to three processes.
+    """
+    asset = bermudan.BlackScholesAsset('Asset', CURRENT_PRICE,
+                                       volatility=VOLATILITY,
+                                       dividend_yield=0.01)
+    exercise_times = [0.25, 0.5, 0.75, 1.0]
+    for option_type in ['put', 'call']:
+        for use_rng in [True, False]:
+            def estimate(method, **kwargs):
+                rng = bermudan.BufferedRNG(seed) if use_rng else None
+                random.seed(seed)
+                option = bermudan.BermudanOption(
+                    'Option', asset, option_type=option_type,
+                    strike_price=STRIKE_PRICE, exercise_times=exercise_times,
+                    rng=rng)
+                return getattr(option, method)(
+                    5, 4, interest_rate=INTEREST_RATE, **kwargs)
+            expected = estimate('value_estimate')
+            for split_level in [None] + list(range(len(exercise_times))):
+                for processes in [1, 2, 3]:
+                    result = estimate('parallel_value_estimate',
+                                      processes=processes,
+                                      split_level=split_level)
+                    assert result == expected, (
+                        f'{option_type = }, {use_rng = }, {split_level = }, '
+                        f'{processes = }: {result} != {expected}')
+
+
+def check_branch_convergence(bermudan, *, seed):
+    """Check the extrapolated bounds of branch_convergence on a small put.
+
+    The bounds must be in order, with the point estimate between them, and
+    must contain the lattice value.
+    """
+    asset = bermudan.BlackScholesAsset('Asset', CURRENT_PRICE,
+                                       volatility=VOLATILITY)
+    option = bermudan.BermudanOption(
+        'Put', asset, option_type='put', strike_price=STRIKE_PRICE,
+        exercise_times=[0.5, 1.0], rng=bermudan.BufferedRNG(seed))
+    reference = option.lattice_value(2000, interest_rate=INTEREST_RATE)
+    for branch_counts in [[4, 8], [3, 4, 6, 8]]:
+        results = option.branch_convergence(branch_counts, 300,
+                                            interest_rate=INTEREST_RATE)
+        low, high, value = results['low'], results['high'], results['value']
+        assert low[0] <= low[1] <= high[1] <= high[2], (
+            f'{branch_counts = }: {low = } and {high = } are out of order')
+        assert value[0] <= value[1] <= value[2], (
+            f'{branch_counts = }: {value = } is out of order')
+        assert value[0] <= reference <= value[2], (
+            f'{branch_counts = }: {value = } does not contain the lattice '
+            f'value {reference}')
+
+
+def run_checks(*, seed=0):
+    """Run the consistency checks of the projects.
+
+    Returns
+    -------
+    dict
+        The error message of each check, or None if it passed.
+    """
+    bermudan = load_project('bermudan')
+    checks = {
+        'parallel_value_estimate': lambda: check_parallel_value_estimate(
+            bermudan, seed=seed),
+        'branch_convergence': lambda: check_branch_convergence(
+            bermudan, seed=seed),
+    }
+    failures = {}
+    for name, check in checks.items():
+        try:
+            check()
+        except AssertionError as error:
+            failures[name] = str(error)
+        else:
+            failures[name] = None
+    return failures
+
+
+def compare_results(baseline, current, *, threshold=0.1, tolerance=1e-6):
+    """Find the regressions between two sets of benchmark results.
+
+    Since the benchmarks are seeded, their accuracy should not change unless
+    the numerics do, so an error (an accuracy value whose name ends in
+    'error') that grows in size by more than tolerance, or a check (a
+    boolean accuracy value) that stops passing, is also a regression.
+
+    Parameters
+    ----------
+    baseline, current : dict
+        The results of run_benchmarks().
+    threshold : float, optional
+        The relative drop in throughput or rise in peak memory that is
+        flagged as a regression, which defaults to 0.1 (i.e. 10%).
+    tolerance : float, optional
+        The absolute rise in the size of an error that is flagged as a
+        regression, which defaults to 1e-6.
+
+    Returns
+    -------
+    list of dict
+        The 'benchmark', 'params', 'metric', 'baseline' and 'current'
+        values of each regression, where the metric of an accuracy value is
+        'accuracy.' followed by its name. Benchmarks missing from either set
+        of results are skipped.
+    """
+    baseline_results = {(result['benchmark'],
+                         json.dumps(result['params'], sort_keys=True)): result
+                        for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        key = (result['benchmark'], json.dumps(result['params'],
+                                               sort_keys=True))
+        if key not in baseline_results:
+            continue
+        old = baseline_results[key]
+        if result['throughput'] < old['throughput'] * (1 - threshold):
+            regressions.append({'benchmark': result['benchmark'],
+                                'params': result['params'],
+                                'metric': 'throughput',
+                                'baseline': old['throughput'],
+                                'current': result['throughput']})
+        if result['peak_memory'] > old['peak_memory'] * (1 + threshold):
+            regressions.append({'benchmark': result['benchmark'],
+                                'params': result['params'],
+                                'metric': 'peak_memory',
+                                'baseline': old['peak_memory'],
+                                'current': result['peak_memory']})
+        for name, value in result['accuracy'].items():
+            old_value = old['accuracy'].get(name)
+            if isinstance(value, bool):
+                regressed = old_value is True and not value
+            elif name.endswith('error') and old_value is not None:
+                # A nan error (such as from a failed solve) is a regression
+                # unless it was already nan
+                regressed = (abs(value) > abs(old_value) + tolerance
+                             or (math.isnan(value)
+                                 and not math.isnan(old_value)))
+            else:
+                continue
+            if regressed:
+                regressions.append({'benchmark': result['benchmark'],
+                                    'params': result['params'],
+                                    'metric': f'accuracy.{name}',
+                                    'baseline': old_value,
+                                    'current': value})
+    return regressions
+
+
+def main(argv=None):
+    """Run the benchmarks or checks, or compare two sets of results.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        The arguments, which default to those of the script.
+
+    Returns
+    -------
+    int
+        The exit status, which is 1 if compare finds any regressions in
+        speed, memory or accuracy, or if any check fails.
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark the Python projects.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('-o', '--output', default='benchmarks.json')
+    run_parser.add_argument('--grid', choices=list(GRIDS), default='quick')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--repeats', type=int, default=1)
+    run_parser.add_argument('--only', nargs='+', choices=list(GRIDS['full']))
+    compare_parser = commands.add_parser(
+        'compare', help='flag the regressions between two sets of results')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+    compare_parser.add_argument('--tolerance', type=float, default=1e-6)
+    check_parser = commands.add_parser(
+        'check', help='run the consistency checks of the projects')
+    check_parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_benchmarks(grid_name=args.grid, seed=args.seed,
+                                 repeats=args.repeats, only=args.only)
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+        for result in results['results']:
+            print(f"{result['benchmark']:<18} {json.dumps(result['params'])}"
+                  f" {result['throughput']:>14,.0f} {result['unit']}/s"
+                  f" {result['peak_memory'] / 2**20:>9.1f} MiB")
+        return 0
+    if args.command == 'check':
+        failures = run_checks(seed=args.seed)
+        for name, failure in failures.items():
+            print(f'PASS {name}' if failure is None
+                  else f'FAIL {name}: {failure}')
+        return 1 if any(failures.values()) else 0
+
+    with open(args.baseline, 'r') as baseline_file, \
+            open(args.current, 'r') as current_file:
+        regressions = compare_results(json.load(baseline_file),
+                                      json.load(current_file),
+                                      threshold=args.threshold,
+                                      tolerance=args.tolerance)
+    for regression in regressions:
+        # Accuracy values are small or boolean, so are printed in full
+        spec = '' if regression['metric'].startswith('accuracy.') else ',.0f'
+        print(f"REGRESSION {regression['benchmark']} "
+              f"{json.dumps(regression['params'])} {regression['metric']}: "
+              f"{regression['baseline']:{spec}} -> "
+              f"{regression['current']:{spec}}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,234 @@
+import concurrent.futures
+import contextlib
+import copy
+import importlib.util
 import math
 import numpy as np
+import os
 import random
 import statistics
+import time
+from multiprocessing import shared_memory
+
+
+# The projects are standalone scripts, so PricingStats and its helpers are
+# also defined in the implied volatility project. The two copies are kept the
+# same.
+class PricingStats:
+    """Opt-in counters, phase timers and hooks of the pricers.
+
+    An instance is passed as the stats parameter of a pricer, which then
+    counts its work (such as nodes built or function evaluations) and times
+    its phases. Without it, the pricers skip all of this.
+
+    Attributes
+    ----------
+    counters : dict
+        The number of each counted event.
+    timings : dict
+        The total time (in seconds) spent in each phase.
+    calls : dict
+        The number of times each phase was timed.
+    hooks : list of function
+        Functions called with the name and time (in seconds) of each phase
+        as soon as it ends.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.timings = {}
+        self.calls = {}
+        self.hooks = []
+
+    def count(self, name, n=1):
+        """Add n to the counter of name."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name, seconds):
+        """Add the time of one phase of name, and call the hooks."""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        for hook in self.hooks:
+            hook(name, seconds)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the body of a with statement as a phase of name."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start_time)
+
+    def add_hook(self, hook):
+        """Add a function called with the name and time of each phase."""
+        self.hooks.append(hook)
+
+    def as_dict(self):
+        """Return copies of the counters, timings and calls of the phases."""
+        return {'counters': dict(self.counters),
+                'timings': dict(self.timings), 'calls': dict(self.calls)}
+
+    def reset(self):
+        """Set every counter and timing back to zero, keeping the hooks."""
+        self.counters.clear()
+        self.timings.clear()
+        self.calls.clear()
+
+
+def _stats_phase(stats, name):
+    """Return the phase timer of stats, or a null context without stats."""
+    return contextlib.nullcontext() if stats is None else stats.phase(name)
+
+
+def _stats_lap(stats):
+    """Return a lap timer of stats, or a function that does nothing.
+
+    Each call lap(name) of the timer adds the time since the previous call
+    (or since the timer was made) as a phase of name.
+    """
+    if stats is None:
+        return _no_lap
+    mark = [time.perf_counter()]
+
+    def lap(name):
+        now = time.perf_counter()
+        stats.add_time(name, now - mark[0])
+        mark[0] = now
+    return lap
+
+
+def _no_lap(name):
+    pass
+
+
+class BufferedRNG:
+    """A random number generator that draws its variates in blocks.
+
+    The generator wraps a numpy.random.Generator and fills buffers of
+    standard normal and Poisson variates block_size (or poisson_block_size)
+    at a time, so that each single draw is a list lookup rather than a call
+    into the generator. It can be given to the simulated assets, the
+    Bermudan options and vasicek_sim in place of the global generators of
+    the random and numpy.random modules, so that each job or thread has its
+    own reproducible stream.
+
+    Parameters
+    ----------
+    seed : int, sequence of ints or numpy.random.SeedSequence, optional
+        The seed of the generator. This is defualted to None, where the seed
+        is drawn from the operating system.
+    block_size : int, optional
+        The number of normal variates drawn at a time, defaulted to 65536.
+    poisson_block_size : int, optional
+        The number of Poisson variates drawn at a time for each rate,
+        defaulted to 4096.
+
+    Attributes
+    ----------
+    seed_sequence : numpy.random.SeedSequence
+        The seed sequence of the generator, from which streams are spawned.
+    generator : numpy.random.Generator
+        The wrapped generator.
+    block_size : int
+        The number of normal variates drawn at a time.
+    poisson_block_size : int
+        The number of Poisson variates drawn at a time for each rate.
+
+    Raises
+    ------
+    ValueError
+        If block_size or poisson_block_size is not a positive integer.
+    """
+
+    # The number of rates whose Poisson buffers are kept
+    max_poisson_rates = 32
+
+    def __init__(self, seed=None, *, block_size=65536,
+                 poisson_block_size=4096):
+        # Check variables and raise appropiate errors
+        if not isinstance(block_size, int) or block_size <= 0:
+            raise ValueError(f"{block_size = } must be a positive integer")
+        if not isinstance(poisson_block_size, int) or poisson_block_size <= 0:
+            raise ValueError(f"{poisson_block_size = } must be a positive \
+                             integer")
+
+        # Initialise instance variables
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self.generator = np.random.Generator(np.random.PCG64(
+            self.seed_sequence))
+        self.block_size = block_size
+        self.poisson_block_size = poisson_block_size
+        # The buffers are lists that are replaced (never changed) when they
+        # run out, so that getstate can keep them without copying
+        self._normals = []
+        self._position = 0
+        self._poissons = {}
+
+    def gauss(self, mu=0.0, sigma=1.0):
+        """Return a normal variate with mean mu and deviation sigma."""
+        if self._position == len(self._normals):
+            self._normals = self.generator.standard_normal(
+                self.block_size).tolist()
+            self._position = 0
+        z = self._normals[self._position]
+        self._position += 1
+        return mu + sigma * z
+
+    def standard_normal(self, size):
+        """Return an array of size standard normal variates.
+
+        The variates continue the same stream as gauss, so mixing the two
+        does not change the variates drawn.
+        """
+        normals = []
+        while size > 0:
+            if self._position == len(self._normals):
+                self._normals = self.generator.standard_normal(
+                    self.block_size).tolist()
+                self._position = 0
+            end = min(len(self._normals), self._position + size)
+            normals.extend(self._normals[self._position:end])
+            size -= end - self._position
+            self._position = end
+        return np.array(normals)
+
+    def poisson(self, lam):
+        """Return a Poisson variate with rate lam."""
+        buffer = self._poissons.get(lam)
+        if buffer is None or buffer[1] == len(buffer[0]):
+            if buffer is None and len(self._poissons) \
+                    >= self.max_poisson_rates:
+                # Forget the buffer of the rate added first
+                del self._poissons[next(iter(self._poissons))]
+            buffer = (self.generator.poisson(
+                lam, self.poisson_block_size).tolist(), 0)
+        self._poissons[lam] = (buffer[0], buffer[1] + 1)
+        return buffer[0][buffer[1]]
+
+    def getstate(self):
+        """Return the state of the generator and its buffers."""
+        return (self.generator.bit_generator.state, self._normals,
+                self._position, dict(self._poissons))
+
+    def setstate(self, state):
+        """Restore a state returned by getstate."""
+        bit_generator_state, self._normals, self._position, poissons = state
+        self.generator.bit_generator.state = bit_generator_state
+        self._poissons = dict(poissons)
+
+    def spawn(self, n):
+        """Return n independent generators for parallel workers.
+
+        The streams are spawned from the seed sequence, so the same seed
+        always gives the same streams.
+        """
+        return [BufferedRNG(seed_sequence, block_size=self.block_size,
+                            poisson_block_size=self.poisson_block_size)
+                for seed_sequence in self.seed_sequence.spawn(n)]
 
 
 class SimulatedAsset:
@@ -18,6 +245,10 @@ class SimulatedAsset:
         zero.
     volatility : int or float
         The volatility of the asset.
+    rng : BufferedRNG, optional
+        The random number generator of the simulations. This is defualted to
+        None, where the global generators of random and numpy.random are
+        used.
 
     Attributes
     ----------
@@ -30,6 +261,10 @@ class SimulatedAsset:
         zero.
     volatility : int or float
         The volatility of the asset.
+    rng : BufferedRNG, optional
+        The random number generator of the simulations. This is defualted to
+        None, where the global generators of random and numpy.random are
+        used.
 
     Raises
     ------
@@ -42,12 +277,14 @@ class SimulatedAsset:
         If the volatility is not an integer or float or is less than zero.
     """
 
-    def __init__(self, name, current_price, *, dividend_yield=0, volatility):
+    def __init__(self, name, current_price, *, dividend_yield=0, volatility,
+                 rng=None):
         # Initialise instance variables
         self.name = name
         self.current_price = current_price
         self.dividend_yield = dividend_yield
         self.volatility = volatility
+        self.rng = rng
 
         # Check variables and raise appropiate errors
         if not isinstance(name, str) or len(name) == 0:
@@ -61,7 +298,7 @@ class SimulatedAsset:
             raise ValueError(f"{volatility = } must be a positive number")
 
     def simulate_path(self, simulated_times, *, interest_rate,
-                      current_price=None):
+                      current_price=None, rng=None):
         """Yield simulated prices along a path of times.
 
         Paramters
@@ -74,6 +311,9 @@ class SimulatedAsset:
         current_price : int or float, optional
             The current price of the asset if provided. This is defualted to
             None.
+        rng : BufferedRNG, optional
+            The random number generator used instead of the asset's. This is
+            defualted to None.
 
         Yields
         ------
@@ -113,11 +353,24 @@ class SimulatedAsset:
             # next step of the iteration
             simul_price = self.simulate_next_price(time,
                                                    interest_rate=interest_rate,
-                                                   current_price=current_price)
+                                                   current_price=current_price,
+                                                   rng=rng)
             current_price = simul_price
             # Yield the next simulated price as instructed
             yield simul_price
 
+    def gauss(self, mu, sigma, rng=None):
+        """Draw a normal variate from rng, the asset's or the global rng."""
+        if rng is None:
+            rng = self.rng
+        return random.gauss(mu, sigma) if rng is None else rng.gauss(mu, sigma)
+
+    def poisson(self, lam, rng=None):
+        """Draw a Poisson variate from rng, the asset's or the global rng."""
+        if rng is None:
+            rng = self.rng
+        return np.random.poisson(lam) if rng is None else rng.poisson(lam)
+
 
 class BlackScholesAsset(SimulatedAsset):
     """A subclass where the asset is simulated using the Black-Scholes Model.
@@ -133,6 +386,10 @@ class BlackScholesAsset(SimulatedAsset):
         zero.
     volatility : int or float
         The volatility of the asset.
+    rng : BufferedRNG, optional
+        The random number generator of the simulations. This is defualted to
+        None, where the global generators of random and numpy.random are
+        used.
 
     Attributes
     ----------
@@ -145,6 +402,10 @@ class BlackScholesAsset(SimulatedAsset):
         zero.
     volatility : int or float
         The volatility of the asset.
+    rng : BufferedRNG, optional
+        The random number generator of the simulations. This is defualted to
+        None, where the global generators of random and numpy.random are
+        used.
 
     Raises
     ------
@@ -157,15 +418,17 @@ class BlackScholesAsset(SimulatedAsset):
         If the volatility is not an integer or float or is less than zero.
     """
 
-    def __init__(self, name, current_price, *, dividend_yield=0, volatility):
+    def __init__(self, name, current_price, *, dividend_yield=0, volatility,
+                 rng=None):
         # Call on the constructor from the parent class: SimulatedAsset
         super().__init__(name, current_price, dividend_yield=dividend_yield,
-                         volatility=volatility)
+                         volatility=volatility, rng=rng)
         # The SimulatedASset constructor contained checks and raises of
         # appropiate errors, therefore not needed again in this constructor
         # due to super proxy.
 
-    def simulate_next_price(self, time, *, interest_rate, current_price=None):
+    def simulate_next_price(self, time, *, interest_rate, current_price=None,
+                            rng=None):
         """Simulate the next price of the asset using the Black-Scholes model.
 
         Parameters
@@ -177,6 +440,9 @@ class BlackScholesAsset(SimulatedAsset):
         current_price : int or float, optional
             The current price of the asset if provided. This is defualted to
             None.
+        rng : BufferedRNG, optional
+            The random number generator used instead of the asset's. This is
+            defualted to None.
 
         Returns
         -------
@@ -208,8 +474,8 @@ class BlackScholesAsset(SimulatedAsset):
                                               - self.dividend_yield
                                               - (self.volatility**2)/2)*time
                                              + self.volatility
-                                             * random.gauss(0,
-                                                            math.sqrt(time)))
+                                             * self.gauss(0, math.sqrt(time),
+                                                          rng))
         return simul_price
 
 
@@ -227,6 +493,10 @@ class MertonAsset(SimulatedAsset):
         zero.
     volatility : int or float
         The volatility of the asset.
+    rng : BufferedRNG, optional
+        The random number generator of the simulations. This is defualted to
+        None, where the global generators of random and numpy.random are
+        used.
     jump_rate : int or float
         The jump_rate is used in the Poisson distribution to overall define the
         compound Poisson process
@@ -248,6 +518,10 @@ class MertonAsset(SimulatedAsset):
         zero.
     volatility : int or float
         The volatility of the asset.
+    rng : BufferedRNG, optional
+        The random number generator of the simulations. This is defualted to
+        None, where the global generators of random and numpy.random are
+        used.
     jump_rate : int or float
         The jump_rate is used in the Poisson distribution to overall define the
         compound Poisson process
@@ -275,10 +549,10 @@ class MertonAsset(SimulatedAsset):
     """
 
     def __init__(self, name, current_price, *, dividend_yield=0, volatility,
-                 jump_rate, jump_alpha, jump_beta):
+                 jump_rate, jump_alpha, jump_beta, rng=None):
         # Call on the constructor from the parent class: SimulatedAsset
         super().__init__(name, current_price, dividend_yield=dividend_yield,
-                         volatility=volatility)
+                         volatility=volatility, rng=rng)
 
         # Initialise additional instance variables
         self.jump_rate = jump_rate
@@ -293,7 +567,8 @@ class MertonAsset(SimulatedAsset):
         if not isinstance(jump_beta, (int, float)) or jump_beta <= 0:
             raise ValueError(f"{jump_beta = } must be a positive number")
 
-    def simulate_next_price(self, time, *, interest_rate, current_price=None):
+    def simulate_next_price(self, time, *, interest_rate, current_price=None,
+                            rng=None):
         """Simulate the next price of the asset using the Merton model.
 
         Parameters
@@ -305,6 +580,9 @@ class MertonAsset(SimulatedAsset):
         current_price : int or float, optional
             The current price of the asset if provided. This is defualted to
             None.
+        rng : BufferedRNG, optional
+            The random number generator used instead of the asset's. This is
+            defualted to None.
 
         Returns
         -------
@@ -333,9 +611,9 @@ class MertonAsset(SimulatedAsset):
 
         # Define N(t): Poisson process; Y(t): Compound Poisson process;
         # z: Brownian motion
-        Nt = np.random.poisson(self.jump_rate * time)
-        Yt = Nt * random.gauss(self.jump_alpha, self.jump_beta)
-        z = random.gauss(0, math.sqrt(time))
+        Nt = self.poisson(self.jump_rate * time, rng)
+        Yt = Nt * self.gauss(self.jump_alpha, self.jump_beta, rng)
+        z = self.gauss(0, math.sqrt(time), rng)
 
         # Calculate the next simulated price using Merton formula
         simul_price = current_price*math.exp((interest_rate
@@ -361,6 +639,9 @@ class BermudanOption:
         This is the type of the Bermudan option, either a 'call' or 'put'.
     strike_price : int or float
         The strike price of the Bermudan option.
+    rng : BufferedRNG, optional
+        The random number generator of the simulations, used instead of the
+        underlying's. This is defualted to None.
 
     Attributes
     ----------
@@ -375,16 +656,44 @@ class BermudanOption:
         This is the type of the Bermudan option, either a 'call' or 'put'.
     strike_price : int or float
         The strike price of the Bermudan option.
+    rng : BufferedRNG or None
+        The random number generator of the simulations.
 
     Methods
     -------
     payoff(current_price=None)
         Find the payoff of the option using current price and strike price.
     value_estimate(branches, simulations, *, confidence_level=0.95,
-                   interest_rate)
+                   interest_rate, stats=None)
         Calculate the minimum, point and maximum value estimate of the price of
         the option.
-    tree_generator(branches, interest_rate)
+    parallel_value_estimate(branches, simulations, *, confidence_level=0.95,
+                            interest_rate, processes=None, split_level=None,
+                            stats=None)
+        Calculate the value estimates with each tree built in parallel.
+    vasicek_value_estimate(branches, simulations, *, confidence_level=0.95,
+                           initial_rate, a, b, sigma, rate_steps=None,
+                           stats=None)
+        Calculate the value estimates with Vasicek interest rates.
+    pruned_value_estimate(branches, simulations, *, confidence_level=0.95,
+                          interest_rate, rng=None, stats=None)
+        Calculate the value estimates on pruned trees.
+    mesh_value_estimate(nodes, simulations, *, paths=None,
+                        confidence_level=0.95, interest_rate)
+        Calculate the value estimates using stochastic meshes.
+    lattice_value(steps, *, interest_rate, method='binomial',
+                  richardson=False)
+        Calculate the value of the option on a recombining lattice.
+    tree_estimates(tree, branches, interest_rate, stats=None,
+                   discounts=None)
+        Calculate the high and low estimates at the initial node of a tree.
+    greeks(branches, simulations, *, confidence_level=0.95, interest_rate,
+           price_bump=0.01, volatility_bump=0.01)
+        Estimate the value, delta, gamma and vega of the option.
+    branch_convergence(branch_counts, simulations, *, confidence_level=0.95,
+                       interest_rate, decay_power=None)
+        Extrapolate the high and low estimates to unlimited branches.
+    tree_generator(branches, interest_rate, stats=None)
         Generate a tree of node sequences and their corresponding prices.
     generate_node_sequences(self, k, branches)
         Generate node sequences iteratively.
@@ -404,7 +713,7 @@ class BermudanOption:
     """
 
     def __init__(self, name, underlying, *, exercise_times, option_type,
-                 strike_price):
+                 strike_price, rng=None):
 
         # Assign attributes
         self.name = name
@@ -412,6 +721,7 @@ class BermudanOption:
         self.exercise_times = exercise_times
         self.option_type = option_type
         self.strike_price = strike_price
+        self.rng = rng
 
         # Check attributes and raise appropiate errors
         if not isinstance(name, str) or len(name) == 0:
@@ -479,7 +789,7 @@ class BermudanOption:
         return payoff
 
     def value_estimate(self, branches, simulations, *, confidence_level=0.95,
-                       interest_rate):
+                       interest_rate, stats=None):
         """Calculate the minimum, point and maximum value estimate.
 
         Parameters
@@ -496,6 +806,10 @@ class BermudanOption:
             default value 0.95.
         interest_rate : int or float
             The risk-free interest_rate.
+        stats : PricingStats, optional
+            If provided, the simulations, nodes, simulated prices and payoffs
+            are counted, and the tree generation, payoff and induction phases
+            are timed. This is defaulted to None.
 
         Returns
         -------
@@ -530,82 +844,15 @@ class BermudanOption:
         High_initial_node = []
         Low_initial_node = []
 
-        # Perform Monte-Carlo simulations
+        # Perform Monte-Carlo simulations, each on a new price tree
         for sim in range(simulations):
-            # generate a price tree and create three empty dictionaries
-            tree = self.tree_generator(branches, interest_rate)
-            payoff_tree = {}
-            High_tree = {}
-            Low_tree = {}
-
-            # Iterate through the node sequences of the tree in reverse.
-            for node_seq, value in reversed(tree.items()):
-
-                # Determine differences in payoff when the length of the node
-                # varies
-                if len(node_seq) > 0:
-                    # All non-zero node sequences will have their payoff
-                    # calculated
-                    payoff_tree[node_seq] = self.payoff(value)
-                    # Find deltak which represents the time between each
-                    # exercise time
-                    exercise_time_index = len(node_seq) - 1
-                    if exercise_time_index > 0:
-                        deltak = self.exercise_times[exercise_time_index]
-                        - self.exercise_times[exercise_time_index-1]
-                    else:
-                        deltak = self.exercise_times[0]
-
-                else:
-                    # Since 0 can never be an exercise time, the payoff at the
-                    # initial node is zero
-                    payoff_tree[()] = 0
-
-                # The next if else statement separates the terminal and
-                # non-terminal nodes
-                if len(node_seq) == len(self.exercise_times):
-                    # According to the instructions, the high and low estimates
-                    # are equal to the payoff at the terminal nodes
-                    High_tree[node_seq] = payoff_tree[node_seq]
-                    Low_tree[node_seq] = payoff_tree[node_seq]
-
-                # Now the non-terminal nodes
-                else:
-                    sum_low_hat = 0
-                    sum_high_next_node_seq = 0
-                    # Create generator that yields all possible nodes from the
-                    # node currently in the reverse iteration
-                    next_node_seq = [node_seq + (a,) for a in range(branches)]
-                    # Iterate through each possible node in the generator
-                    for a in next_node_seq:
-                        sum_high_next_node_seq += High_tree[a]
-                        # Create a similar generator to before that yields all
-                        # possible nodes apart from the node currently in the
-                        # first generator
-                        low_prime = [Low_tree[a_prime] for a_prime in
-                                     next_node_seq if a_prime != a]
-                        average_low_prime = (np.exp(-1 * interest_rate
-                                                    * deltak) / (branches-1)) \
-                            * sum(low_prime)
-                        # Determine which value the low_hat should be at each a
-                        if average_low_prime <= payoff_tree[node_seq]:
-                            low_hat = payoff_tree[node_seq]
-                        else:
-                            low_hat = np.exp(-1*interest_rate * deltak) \
-                                * Low_tree[a]
-                        sum_low_hat += low_hat
-                    # Implement the max function as instructed from the problem
-                    High_tree[node_seq] = max(payoff_tree[node_seq],
-                                              ((math.exp(-1 * interest_rate
-                                                         * deltak)) / branches)
-                                              * sum_high_next_node_seq)
-                    # Find the low estimate by averaging the low_hats
-                    Low_tree[node_seq] = (1 / branches) * sum_low_hat
-
-            # Append the the initial node of the high estimate and low estimate
-            # trees to the empty lists
-            High_initial_node.append(High_tree[()])
-            Low_initial_node.append(Low_tree[()])
+            tree = self.tree_generator(branches, interest_rate, stats=stats)
+            high, low = self.tree_estimates(tree, branches, interest_rate,
+                                            stats=stats)
+            High_initial_node.append(high)
+            Low_initial_node.append(low)
+        if stats is not None:
+            stats.count('simulations', simulations)
 
         # Find the means of the high and low estimates
         L_mean = np.mean(Low_initial_node)
@@ -624,7 +871,1322 @@ class BermudanOption:
         # Return these results as a tuple
         return (V_min, point_estimate, V_max)
 
-    def tree_generator(self, branches, interest_rate):
+    def parallel_value_estimate(self, branches, simulations, *,
+                                confidence_level=0.95, interest_rate,
+                                processes=None, split_level=None,
+                                stats=None):
+        """Calculate the value estimates with each tree built in parallel.
+
+        The same as value_estimate, except that each tree is held as arrays
+        of its levels in shared memory. The levels down to split_level are
+        simulated in this process, then a pool of processes each build and
+        collapse a block of the subtrees below that level, and then the
+        levels above are collapsed in this process. Only the names of the
+        shared memory and the blocks are sent to the processes.
+
+        The normal variates are drawn in the same order as tree_generator,
+        and the prices and estimates are found with the same operations in
+        the same order as tree_generator and tree_estimates, so the estimates
+        are exactly those of value_estimate from the same random state,
+        whatever the number of processes and split_level.
+
+        Parameters
+        ----------
+        branches : int
+            The (whole) number of branches (at least 2) each non-terminal node
+            in the tree has.
+        simulations : int
+            The (whole) number of Monte-Carlo simulations (at least 2) to
+            perform.
+        confidence interval : float, optional
+            The confidence level for the (conservative, approximate) confidence
+            interval, which should be a number strictly between 0 and 1, with
+            default value 0.95.
+        interest_rate : int or float
+            The risk-free interest_rate.
+        processes : int, optional
+            The number of processes. This is defaulted to None, where it is
+            the number of CPUs. If processes == 1, the subtrees are built in
+            this process.
+        split_level : int, optional
+            The level of the roots of the subtrees, which is at least zero and
+            less than the number of exercise times. This is defaulted to None,
+            where it is the first level with at least 64 subtrees (or the last
+            level before maturity), whatever the number of processes.
+        stats : PricingStats, optional
+            If provided, the simulations, nodes, simulated prices and payoffs
+            are counted, and the 'tree_generator', 'subtrees' and 'induction'
+            phases are timed. This is defaulted to None.
+
+        Returns
+        -------
+        tuple
+            The minimum, point and maximum value estimate.
+
+        Raises
+        ------
+        TypeError
+            If the underlying is not a BlackScholesAsset.
+        ValueError
+            If branches is not an integer is not more than or equal to two.
+            If simulations is not an integer is not more than or equal to two.
+            If confidence_interval is not a float or does not lie strictly
+            between zero and one.
+            If the interest_rate is not an integer or float or is less than or
+            equal to zero
+            If processes is not a positive integer.
+            If split_level is not an integer of at least zero and less than
+            the number of exercise times.
+        """
+        # Check attributes and raise appropiate errors
+        levels = len(self.exercise_times)
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if split_level is None:
+            split_level = 0
+            while split_level < levels - 1 \
+                    and branches**split_level < 64:
+                split_level += 1
+        if not isinstance(self.underlying, BlackScholesAsset):
+            raise TypeError(f"{self.underlying = } must be an instance of \
+                            BlackScholesAsset")
+        if not isinstance(branches, int) or branches < 2:
+            raise ValueError(f"{branches = } must be an integer of at least 2")
+        if not isinstance(simulations, int) or simulations < 2:
+            raise ValueError(f"{simulations = } must be an integer of at \
+                             least 2")
+        if not isinstance(confidence_level, float) or not (0 < confidence_level
+                                                           < 1):
+            raise ValueError(f"{confidence_level = } must be anumber strictly \
+                             between 0 and 1")
+        if not isinstance(interest_rate, (int, float)) or interest_rate <= 0:
+            raise ValueError(f"{interest_rate = } must be a positive number")
+        if not isinstance(processes, int) or processes < 1:
+            raise ValueError(f"{processes = } must be a positive integer")
+        if not isinstance(split_level, int) or not (0 <= split_level
+                                                    < levels):
+            raise ValueError(f"{split_level = } must be an integer of at \
+                             least 0 and less than {levels}")
+
+        # The levels are stored one after another, in level order
+        offsets = [0]
+        for k in range(levels + 1):
+            offsets.append(offsets[-1] + branches**k)
+        subtrees = branches**split_level
+        params = {'branches': branches,
+                  'drift': (interest_rate - self.underlying.dividend_yield
+                            - (self.underlying.volatility**2)/2),
+                  'exercise_times': self.exercise_times,
+                  'interest_rate': interest_rate,
+                  'nodes': offsets[-1],
+                  'offsets': offsets,
+                  'option_type': self.option_type,
+                  'split_level': split_level,
+                  'strike_price': self.strike_price,
+                  'subtrees': subtrees,
+                  'volatility': self.underlying.volatility}
+        # Split the subtrees into one contiguous block for each process
+        blocks = min(processes, subtrees)
+        bounds = [subtrees * i // blocks for i in range(blocks + 1)]
+
+        shared = shared_memory.SharedMemory(
+            create=True, size=8 * (2*offsets[-1] - 1 + 2*subtrees))
+        try:
+            if processes == 1:
+                executor = contextlib.nullcontext()
+            else:
+                executor = concurrent.futures.ProcessPoolExecutor(processes)
+            with executor:
+                High_initial_node, Low_initial_node = \
+                    self._shared_tree_estimates(
+                        shared, params, simulations,
+                        zip(bounds[:-1], bounds[1:]),
+                        None if processes == 1 else executor, stats)
+        finally:
+            shared.close()
+            shared.unlink()
+        if stats is not None:
+            stats.count('simulations', simulations)
+            stats.count('nodes', simulations * offsets[-1])
+            stats.count('simulate_next_price',
+                        simulations * (offsets[-1] - 1))
+            stats.count('payoffs', simulations * (offsets[-1] - 1))
+
+        # Find the means of the high and low estimates
+        L_mean = np.mean(Low_initial_node)
+        H_mean = np.mean(High_initial_node)
+
+        # Find the minimum, point and maximum etimate of the price of the
+        # option using the same formula as value_estimate
+        V_min = L_mean - ((np.std(Low_initial_node)
+                           / math.sqrt(simulations))) \
+            * statistics.NormalDist(0, 1).inv_cdf((1 + confidence_level) / 2)
+        point_estimate = (H_mean + L_mean) / 2
+        V_max = H_mean + ((np.std(High_initial_node)
+                           / math.sqrt(simulations))) \
+            * statistics.NormalDist(0, 1).inv_cdf((1 + confidence_level)/2)
+        return (V_min, point_estimate, V_max)
+
+    def _shared_tree_estimates(self, shared, params, simulations, blocks,
+                               executor, stats):
+        """Calculate the high and low estimates of trees in shared memory.
+
+        Parameters
+        ----------
+        shared : multiprocessing.shared_memory.SharedMemory
+            The shared memory of the tree.
+        params : dict
+            The parameters of the tree, as made by parallel_value_estimate.
+        simulations : int
+            The number of trees.
+        blocks : iterable of tuples
+            The first and (one past) the last node of the split level of each
+            block of subtrees.
+        executor : concurrent.futures.Executor or None
+            The pool of processes, or None to build the subtrees here.
+        stats : PricingStats or None
+            The statistics, timed as in parallel_value_estimate.
+
+        Returns
+        -------
+        tuple of lists
+            The high and low estimates at the initial node of each tree.
+        """
+        # The arrays are views of the shared memory, so they must not outlive
+        # this method
+        prices, normals, High, Low = _shared_tree_arrays(
+            shared.buf, params['nodes'], params['subtrees'])
+        offsets = params['offsets']
+        split_level = params['split_level']
+        blocks = list(blocks)
+        rng = self.rng if self.rng is not None else self.underlying.rng
+        High_initial_node = []
+        Low_initial_node = []
+        for sim in range(simulations):
+            lap = _stats_lap(stats)
+            # Draw the normal variates of the whole tree in the order that
+            # tree_generator does, then simulate the levels above the
+            # subtrees
+            if rng is None:
+                normals[:] = [random.gauss(0, 1) for i in range(len(normals))]
+            else:
+                normals[:] = rng.standard_normal(len(normals))
+            prices[0] = self.underlying.current_price
+            for k in range(split_level):
+                prices[offsets[k+1]:offsets[k+2]] = _simulate_level(
+                    prices[offsets[k]:offsets[k+1]],
+                    normals[offsets[k+1] - 1:offsets[k+2] - 1], params, k)
+            lap('tree_generator')
+
+            # Build and collapse the subtrees, a block in each process
+            if executor is None:
+                for start, stop in blocks:
+                    _subtree_estimates(shared.name, params, start, stop)
+            else:
+                futures = [executor.submit(_subtree_estimates, shared.name,
+                                           params, start, stop)
+                           for start, stop in blocks]
+                for future in futures:
+                    future.result()
+            lap('subtrees')
+
+            # Collapse the levels above the subtrees
+            High_next, Low_next = High.copy(), Low.copy()
+            for k in range(split_level - 1, -1, -1):
+                High_next, Low_next = _induct_level(
+                    prices[offsets[k]:offsets[k+1]], High_next, Low_next,
+                    params, k)
+            High_initial_node.append(float(High_next[0]))
+            Low_initial_node.append(float(Low_next[0]))
+            lap('induction')
+        return High_initial_node, Low_initial_node
+
+    def vasicek_value_estimate(self, branches, simulations, *,
+                               confidence_level=0.95, initial_rate, a, b,
+                               sigma, rate_steps=None, stats=None):
+        """Calculate the value estimates with Vasicek interest rates.
+
+        The same as value_estimate, except that each simulation has its own
+        path of the short rate, simulated by vasicek_sim. The integrals of
+        the rates over the exercise intervals of every path are found first,
+        by the trapezium rule in one array pass, and give both the discount
+        factors of the intervals and the drift of the underlying over them.
+        Since the simulated prices depend on the interest rate only through
+        the factor exp(interest_rate*time), each tree is generated at the
+        rate b and then scaled to the integrated rates of its path. The
+        rates are shared by every node of a tree, so each tree is priced
+        given its rate path.
+
+        Parameters
+        ----------
+        branches : int
+            The (whole) number of branches (at least 2) each non-terminal node
+            in the tree has.
+        simulations : int
+            The (whole) number of Monte-Carlo simulations (at least 2) to
+            perform.
+        confidence interval : float, optional
+            The confidence level for the (conservative, approximate) confidence
+            interval, which should be a number strictly between 0 and 1, with
+            default value 0.95.
+        initial_rate : int or float
+            The current short rate.
+        a, b, sigma : int or float
+            The speed of mean reversion, long-term mean and volatility of the
+            short rate, as in vasicek_sim.
+        rate_steps : int, optional
+            The (whole) number of steps of the rate paths up to the maturity
+            time. This is defaulted to None, where the steps are weekly (at
+            least one for each exercise time).
+        stats : PricingStats, optional
+            If provided, the simulations, nodes, simulated prices and payoffs
+            are counted, and the 'rate_paths', tree generation, payoff and
+            induction phases are timed. This is defaulted to None.
+
+        Returns
+        -------
+        tuple
+            The minimum, point and maximum value estimate.
+
+        Raises
+        ------
+        ValueError
+            If branches is not an integer is not more than or equal to two.
+            If simulations is not an integer is not more than or equal to two.
+            If confidence_interval is not a float or does not lie strictly
+            between zero and one.
+            If the initial_rate is not an integer or float.
+            If a, b or sigma is not an integer or float or is less than or
+            equal to zero.
+            If rate_steps is not a positive integer.
+        """
+        # Check attributes and raise appropiate errors
+        levels = len(self.exercise_times)
+        if rate_steps is None:
+            rate_steps = max(levels, math.ceil(52 * self.maturity_time))
+        if not isinstance(branches, int) or branches < 2:
+            raise ValueError(f"{branches = } must be an integer of at least 2")
+        if not isinstance(simulations, int) or simulations < 2:
+            raise ValueError(f"{simulations = } must be an integer of at \
+                             least 2")
+        if not isinstance(confidence_level, float) or not (0 < confidence_level
+                                                           < 1):
+            raise ValueError(f"{confidence_level = } must be anumber strictly \
+                             between 0 and 1")
+        if not isinstance(initial_rate, (int, float)):
+            raise ValueError(f"{initial_rate = } must be a number")
+        for name, value in [('a', a), ('b', b), ('sigma', sigma)]:
+            if not isinstance(value, (int, float)) or value <= 0:
+                raise ValueError(f"{name} = {value!r} must be a positive \
+                                 number")
+        if not isinstance(rate_steps, int) or rate_steps < 1:
+            raise ValueError(f"{rate_steps = } must be a positive integer")
+
+        # Simulate the rate paths of every simulation, and integrate them up
+        # to each point of the paths by the trapezium rule
+        lap = _stats_lap(stats)
+        rng = self.rng if self.rng is not None else self.underlying.rng
+        rates = np.array(_vasicek_sim(float(initial_rate), self.maturity_time,
+                                      rate_steps, simulations, a=a, b=b,
+                                      sigma=sigma, rng=rng))
+        step = self.maturity_time / rate_steps
+        integrals = np.zeros_like(rates)
+        integrals[:, 1:] = np.cumsum((rates[:, :-1] + rates[:, 1:]) / 2
+                                     * step, axis=1)
+
+        # Interpolate the integrals at the exercise times, and find those of
+        # each exercise interval
+        positions = np.array(self.exercise_times) / step
+        indices = np.minimum(positions.astype(int), rate_steps - 1)
+        weights = positions - indices
+        exercise_integrals = (1 - weights) * integrals[:, indices] \
+            + weights * integrals[:, indices + 1]
+        interval_integrals = np.diff(exercise_integrals, axis=1,
+                                     prepend=0)
+
+        # The discount factors of the intervals, and the factors that scale
+        # each level of a tree generated at the rate b to the path's rates
+        deltaks = np.diff(self.exercise_times, prepend=0)
+        discount_grid = np.exp(-interval_integrals)
+        scale_grid = np.ones((simulations, levels + 1))
+        scale_grid[:, 1:] = np.exp(np.cumsum(interval_integrals
+                                             - b * deltaks, axis=1))
+        lap('rate_paths')
+
+        # Perform Monte-Carlo simulations, each on a new price tree with its
+        # own rate path
+        High_initial_node = []
+        Low_initial_node = []
+        for sim in range(simulations):
+            tree = self.tree_generator(branches, b, stats=stats)
+            scales = scale_grid[sim].tolist()
+            tree = {node_seq: price * scales[len(node_seq)]
+                    for node_seq, price in tree.items()}
+            high, low = self.tree_estimates(
+                tree, branches, b, stats=stats,
+                discounts=discount_grid[sim].tolist())
+            High_initial_node.append(high)
+            Low_initial_node.append(low)
+        if stats is not None:
+            stats.count('simulations', simulations)
+
+        # Find the minimum, point and maximum estimate using the same formula
+        # as value_estimate
+        L_mean = np.mean(Low_initial_node)
+        H_mean = np.mean(High_initial_node)
+        V_min = L_mean - ((np.std(Low_initial_node)
+                           / math.sqrt(simulations))) \
+            * statistics.NormalDist(0, 1).inv_cdf((1 + confidence_level) / 2)
+        point_estimate = (H_mean + L_mean) / 2
+        V_max = H_mean + ((np.std(High_initial_node)
+                           / math.sqrt(simulations))) \
+            * statistics.NormalDist(0, 1).inv_cdf((1 + confidence_level)/2)
+        return (V_min, point_estimate, V_max)
+
+    def pruned_value_estimate(self, branches, simulations, *,
+                              confidence_level=0.95, interest_rate, rng=None,
+                              stats=None):
+        """Calculate the value estimates on pruned trees.
+
+        The same as value_estimate, except that the trees do not branch where
+        the exercise decision is already known, so that far fewer nodes are
+        simulated:
+
+        - At a node (other than the initial node) where the payoff is zero,
+          exercising is never optimal, so a single branch is simulated and
+          the high and low estimates are its discounted estimates.
+        - At the last exercise time before maturity, if the underlying is a
+          BlackScholesAsset, the continuation value is the value of a
+          European option, so the high and low estimates are the maximum of
+          the payoff and the Black-Scholes value, without any branches.
+
+        Both rules leave the high estimate biased high and the low estimate
+        biased low, so the confidence interval remains conservative.
+
+        Parameters
+        ----------
+        branches : int
+            The (whole) number of branches (at least 2) each non-terminal node
+            in the tree has, unless it is pruned.
+        simulations : int
+            The (whole) number of Monte-Carlo simulations (at least 2) to
+            perform.
+        confidence_level : float, optional
+            The confidence level for the (conservative, approximate) confidence
+            interval, which should be a number strictly between 0 and 1, with
+            default value 0.95.
+        interest_rate : int or float
+            The risk-free interest_rate.
+        rng : BufferedRNG, optional
+            The random number generator used instead of the option's. This is
+            defualted to None.
+        stats : PricingStats, optional
+            If provided, the simulations, the nodes simulated and the nodes
+            pruned from the full trees are counted. This is defualted to None.
+
+        Returns
+        -------
+        tuple
+            The minimum, point and maximum value estimate.
+
+        Raises
+        ------
+        ValueError
+            If branches is not an integer is not more than or equal to two.
+            If simulations is not an integer is not more than or equal to two.
+            If confidence_interval is not a float or does not lie strictly
+            between zero and one.
+            If the interest_rate is not an integer or float or is less than or
+            equal to zero
+        """
+        # Check attributes and raise appropiate errors
+        if not isinstance(branches, int) or branches < 2:
+            raise ValueError(f"{branches = } must be an integer of at least 2")
+        if not isinstance(simulations, int) or simulations < 2:
+            raise ValueError(f"{simulations = } must be an integer of at \
+                             least 2")
+        if not isinstance(confidence_level, float) or not (0 < confidence_level
+                                                           < 1):
+            raise ValueError(f"{confidence_level = } must be anumber strictly \
+                             between 0 and 1")
+        if not isinstance(interest_rate, (int, float)) or interest_rate <= 0:
+            raise ValueError(f"{interest_rate = } must be a positive number")
+
+        if rng is None:
+            rng = self.rng
+
+        # Perform Monte-Carlo simulations, counting the nodes simulated
+        High_initial_node = []
+        Low_initial_node = []
+        nodes = [0]
+        for sim in range(simulations):
+            high, low = self._pruned_estimates(self.underlying.current_price,
+                                               0, branches, interest_rate,
+                                               nodes, rng)
+            High_initial_node.append(high)
+            Low_initial_node.append(low)
+        if stats is not None:
+            full_nodes = simulations * sum(
+                branches**k for k in range(len(self.exercise_times) + 1))
+            stats.count('simulations', simulations)
+            stats.count('nodes', nodes[0])
+            stats.count('nodes_pruned', full_nodes - nodes[0])
+
+        # Find the minimum, point and maximum estimate using the same formula
+        # as value_estimate
+        z = statistics.NormalDist(0, 1).inv_cdf((1 + confidence_level) / 2)
+        L_mean = np.mean(Low_initial_node)
+        H_mean = np.mean(High_initial_node)
+        V_min = L_mean - z * np.std(Low_initial_node) / math.sqrt(simulations)
+        point_estimate = (H_mean + L_mean) / 2
+        V_max = H_mean + z * np.std(High_initial_node) / math.sqrt(simulations)
+        return (V_min, point_estimate, V_max)
+
+    def _pruned_estimates(self, current_price, k, branches, interest_rate,
+                          nodes, rng):
+        """Simulate a pruned subtree and return its high and low estimates.
+
+        Parameters
+        ----------
+        current_price : float
+            The price of the asset at the node.
+        k : int
+            The number of exercise times up to and including the node.
+        branches : int
+            The number of branches each non-pruned node has.
+        interest_rate : int or float
+            The risk-free interest_rate.
+        nodes : list of int
+            A one-element list whose element counts the simulated nodes.
+        rng : BufferedRNG or None
+            The random number generator of the simulations.
+
+        Returns
+        -------
+        tuple
+            The high and low estimate at the node.
+        """
+        nodes[0] += 1
+        # Since 0 can never be an exercise time, the payoff at the initial
+        # node is zero, and the estimates of the terminal nodes are their
+        # payoffs
+        payoff = self.payoff(current_price) if k > 0 else 0
+        if k == len(self.exercise_times):
+            return payoff, payoff
+
+        # Find deltak which represents the time between this node and the
+        # next exercise time
+        if k > 0:
+            deltak = self.exercise_times[k] - self.exercise_times[k-1]
+        else:
+            deltak = self.exercise_times[0]
+        discount = math.exp(-1 * interest_rate * deltak)
+
+        # At the last exercise time before maturity, the continuation value of
+        # a Black-Scholes asset is known exactly
+        if k == len(self.exercise_times) - 1 and \
+                isinstance(self.underlying, BlackScholesAsset):
+            value = max(payoff, self._european_value(current_price, deltak,
+                                                     interest_rate))
+            return value, value
+
+        # Where the payoff is zero, exercising is never optimal, so a single
+        # branch is enough
+        if k > 0 and payoff == 0:
+            next_price = self.underlying.simulate_next_price(
+                deltak, interest_rate=interest_rate,
+                current_price=current_price, rng=rng)
+            high, low = self._pruned_estimates(next_price, k + 1, branches,
+                                               interest_rate, nodes, rng)
+            return discount * high, discount * low
+
+        # Otherwise, the estimates are found from all the branches as in
+        # tree_estimates
+        High_next = []
+        Low_next = []
+        for a in range(branches):
+            next_price = self.underlying.simulate_next_price(
+                deltak, interest_rate=interest_rate,
+                current_price=current_price, rng=rng)
+            high, low = self._pruned_estimates(next_price, k + 1, branches,
+                                               interest_rate, nodes, rng)
+            High_next.append(high)
+            Low_next.append(low)
+        sum_low = sum(Low_next)
+        sum_low_hat = 0
+        for low in Low_next:
+            average_low_prime = (discount / (branches-1)) * (sum_low - low)
+            if average_low_prime <= payoff:
+                sum_low_hat += payoff
+            else:
+                sum_low_hat += discount * low
+        return (max(payoff, (discount / branches) * sum(High_next)),
+                (1 / branches) * sum_low_hat)
+
+    def _european_value(self, current_price, time, interest_rate):
+        """Find the Black-Scholes value of the European option.
+
+        Parameters
+        ----------
+        current_price : float
+            The current price of the asset.
+        time : int or float
+            The time to maturity.
+        interest_rate : int or float
+            The risk-free interest_rate.
+
+        Returns
+        -------
+        float
+            The value of a European option with the same strike price and
+            type, on the (Black-Scholes) underlying asset.
+        """
+        volatility = self.underlying.volatility
+        dividend_yield = self.underlying.dividend_yield
+        if volatility == 0:
+            forward = current_price * math.exp((interest_rate
+                                                - dividend_yield) * time)
+            return math.exp(-interest_rate * time) * self.payoff(forward)
+        d1 = (math.log(current_price / self.strike_price)
+              + (interest_rate - dividend_yield + (volatility**2) / 2)
+              * time) / (volatility * math.sqrt(time))
+        d2 = d1 - volatility * math.sqrt(time)
+        sign = 1 if self.option_type == 'call' else -1
+        N = statistics.NormalDist(0, 1).cdf
+        return sign * (current_price * math.exp(-dividend_yield * time)
+                       * N(sign * d1)
+                       - self.strike_price * math.exp(-interest_rate * time)
+                       * N(sign * d2))
+
+    def mesh_value_estimate(self, nodes, simulations, *, paths=None,
+                            confidence_level=0.95, interest_rate):
+        """Calculate the value estimates using stochastic meshes.
+
+        Each simulation generates a mesh of nodes independent paths of the
+        underlying, whose prices at each exercise time are shared as the nodes
+        of that exercise time. Every node is connected to every node of the
+        next exercise time, weighted by the Black-Scholes transition density
+        divided by the average density of reaching that node, so the cost
+        grows as nodes**2 times the number of exercise times rather than
+        exponentially.
+
+        The high estimate is found by backward induction on the mesh. The low
+        estimate is the average discounted payoff of paths independent paths,
+        which are exercised as soon as the payoff is at least the continuation
+        value estimated from the mesh.
+
+        Parameters
+        ----------
+        nodes : int
+            The (whole) number of nodes (at least 2) of the mesh at each
+            exercise time.
+        simulations : int
+            The (whole) number of meshes (at least 2) to simulate.
+        paths : int, optional
+            The (whole) number of paths (at least 1) for the low estimate of
+            each mesh. This is defaulted to None, where it is equal to nodes.
+        confidence_level : float, optional
+            The confidence level for the (conservative, approximate) confidence
+            interval, which should be a number strictly between 0 and 1, with
+            default value 0.95.
+        interest_rate : int or float
+            The risk-free interest_rate.
+
+        Returns
+        -------
+        tuple
+            The minimum, point and maximum value estimate.
+
+        Raises
+        ------
+        TypeError
+            If the underlying is not a BlackScholesAsset.
+        ValueError
+            If nodes is not an integer is not more than or equal to two.
+            If simulations is not an integer is not more than or equal to two.
+            If paths is not an integer is not more than or equal to one.
+            If confidence_interval is not a float or does not lie strictly
+            between zero and one.
+            If the interest_rate is not an integer or float or is less than or
+            equal to zero
+            If the volatility of the underlying is zero.
+        """
+        # Check attributes and raise appropiate errors
+        if paths is None:
+            paths = nodes
+        if not isinstance(self.underlying, BlackScholesAsset):
+            raise TypeError(f"{self.underlying = } must be an instance of \
+                            BlackScholesAsset")
+        if not isinstance(nodes, int) or nodes < 2:
+            raise ValueError(f"{nodes = } must be an integer of at least 2")
+        if not isinstance(simulations, int) or simulations < 2:
+            raise ValueError(f"{simulations = } must be an integer of at \
+                             least 2")
+        if not isinstance(paths, int) or paths < 1:
+            raise ValueError(f"{paths = } must be an integer of at least 1")
+        if not isinstance(confidence_level, float) or not (0 < confidence_level
+                                                           < 1):
+            raise ValueError(f"{confidence_level = } must be anumber strictly \
+                             between 0 and 1")
+        if not isinstance(interest_rate, (int, float)) or interest_rate <= 0:
+            raise ValueError(f"{interest_rate = } must be a positive number")
+        if self.underlying.volatility == 0:
+            raise ValueError("the volatility of the underlying must be \
+                             positive")
+
+        # Find the time between each exercise time (starting from time 0)
+        # and the mean and standard deviation of the log-returns over them
+        deltas = np.diff([0] + list(self.exercise_times))
+        volatility = self.underlying.volatility
+        drifts = (interest_rate - self.underlying.dividend_yield
+                  - (volatility**2) / 2) * deltas
+        deviations = volatility * np.sqrt(deltas)
+        discounts = np.exp(-interest_rate * deltas)
+        sign = 1 if self.option_type == 'call' else -1
+
+        High_initial_node = []
+        Low_initial_node = []
+        for sim in range(simulations):
+            # Generate the mesh: the prices of each path (column) at each
+            # exercise time (row)
+            mesh = np.empty((len(self.exercise_times), nodes))
+            for j in range(nodes):
+                current_price = self.underlying.current_price
+                for k in range(len(self.exercise_times)):
+                    current_price = self.underlying.simulate_next_price(
+                        deltas[k], interest_rate=interest_rate,
+                        current_price=current_price, rng=self.rng)
+                    mesh[k, j] = current_price
+            payoffs = np.maximum(sign * (mesh - self.strike_price), 0)
+
+            # The backward induction of the high estimate. The transition
+            # densities between the nodes of consecutive exercise times are
+            # left unnormalised, since the constants cancel in the weights.
+            # The average densities of reaching each node are kept for the
+            # low estimate.
+            High = [None] * len(self.exercise_times)
+            average_densities = [None] * len(self.exercise_times)
+            High[-1] = payoffs[-1]
+            for k in range(len(self.exercise_times) - 2, -1, -1):
+                densities = self._mesh_densities(mesh[k][:, np.newaxis],
+                                                 mesh[k+1], drifts[k+1],
+                                                 deviations[k+1])
+                average_densities[k+1] = densities.mean(axis=0)
+                continuation = discounts[k+1] * (
+                    densities / average_densities[k+1]) @ High[k+1] / nodes
+                High[k] = np.maximum(payoffs[k], continuation)
+            # The nodes of the first exercise time are all reached from the
+            # initial node, whose payoff is zero
+            High_initial_node.append(discounts[0] * np.mean(High[0]))
+
+            # The low estimate: each independent path is exercised at the
+            # first exercise time at which the payoff is at least the
+            # continuation value estimated from the mesh
+            low_sum = 0
+            for path in range(paths):
+                current_price = self.underlying.current_price
+                for k, time in enumerate(self.exercise_times):
+                    current_price = self.underlying.simulate_next_price(
+                        deltas[k], interest_rate=interest_rate,
+                        current_price=current_price, rng=self.rng)
+                    payoff = self.payoff(current_price)
+                    if k == len(self.exercise_times) - 1:
+                        break
+                    if payoff > 0:
+                        densities = self._mesh_densities(
+                            current_price, mesh[k+1], drifts[k+1],
+                            deviations[k+1])
+                        continuation = discounts[k+1] * np.mean(
+                            densities / average_densities[k+1] * High[k+1])
+                        if payoff >= continuation:
+                            break
+                low_sum += math.exp(-interest_rate * time) * payoff
+            Low_initial_node.append(low_sum / paths)
+
+        # Find the minimum, point and maximum estimate using the same formula
+        # as value_estimate
+        z = statistics.NormalDist(0, 1).inv_cdf((1 + confidence_level) / 2)
+        L_mean = np.mean(Low_initial_node)
+        H_mean = np.mean(High_initial_node)
+        V_min = L_mean - z * np.std(Low_initial_node) / math.sqrt(simulations)
+        point_estimate = (H_mean + L_mean) / 2
+        V_max = H_mean + z * np.std(High_initial_node) / math.sqrt(simulations)
+        return (V_min, point_estimate, V_max)
+
+    def lattice_value(self, steps, *, interest_rate, method='binomial',
+                      richardson=False):
+        """Calculate the value of the option on a recombining lattice.
+
+        The lifetime of the option is divided into steps equal time steps of a
+        Cox-Ross-Rubinstein binomial lattice, or of a trinomial lattice, and
+        the value is found by backward induction one time slice at a time, so
+        only the values of a single slice are kept. The option can only be
+        exercised at the steps closest to its exercise times, which are
+        exactly the exercise times when these are multiples of the maturity
+        time divided by steps. The trinomial lattice is built from two
+        binomial half-steps, so its value with steps time steps is the
+        binomial value with 2*steps time steps.
+
+        With Richardson extrapolation, the values with steps and 2*steps time
+        steps are combined as if their errors were proportional to 1/steps.
+        The error of the binomial lattice oscillates with steps (with where
+        the strike price lies between the nodes), so this is not reliably
+        more accurate than the value without it, and is off by default.
+
+        Parameters
+        ----------
+        steps : int
+            The (whole) number of time steps (at least 1) of the lattice.
+        interest_rate : int or float
+            The risk-free interest_rate.
+        method : str, optional
+            Either 'binomial' or 'trinomial', with default value 'binomial'.
+        richardson : bool, optional
+            Whether the value is extrapolated from the values with steps and
+            2*steps time steps, with default value False.
+
+        Returns
+        -------
+        float
+            The value of the option.
+
+        Raises
+        ------
+        TypeError
+            If the underlying is not a BlackScholesAsset.
+            If method is not either 'binomial' or 'trinomial'.
+        ValueError
+            If steps is not an integer is not more than or equal to one.
+            If the interest_rate is not an integer or float or is less than or
+            equal to zero
+            If the volatility of the underlying is zero, or is too small for
+            the probabilities of the lattice to be positive.
+        """
+        # Check attributes and raise appropiate errors
+        if not isinstance(self.underlying, BlackScholesAsset):
+            raise TypeError(f"{self.underlying = } must be an instance of \
+                            BlackScholesAsset")
+        if method not in ['binomial', 'trinomial']:
+            raise TypeError(f'{method = } must be either "binomial" or \
+                            "trinomial"')
+        if not isinstance(steps, int) or steps < 1:
+            raise ValueError(f"{steps = } must be an integer of at least 1")
+        if not isinstance(interest_rate, (int, float)) or interest_rate <= 0:
+            raise ValueError(f"{interest_rate = } must be a positive number")
+        if self.underlying.volatility == 0:
+            raise ValueError("the volatility of the underlying must be \
+                             positive")
+
+        value = self._lattice_induction(steps, interest_rate, method)
+        if richardson:
+            # This removes the leading error term only where the error is
+            # smooth in 1/steps, which the oscillating error of the lattice is
+            # not in general
+            value = 2 * self._lattice_induction(2 * steps, interest_rate,
+                                                method) - value
+        return value
+
+    def _lattice_induction(self, steps, interest_rate, method):
+        """Find the value of the option on a lattice with steps time steps.
+
+        Parameters
+        ----------
+        steps : int
+            The number of time steps of the lattice.
+        interest_rate : int or float
+            The risk-free interest_rate.
+        method : str
+            Either 'binomial' or 'trinomial'.
+
+        Returns
+        -------
+        float
+            The value of the option.
+        """
+        dt = self.maturity_time / steps
+        volatility = self.underlying.volatility
+        growth = math.exp((interest_rate - self.underlying.dividend_yield)
+                          * dt)
+        discount = math.exp(-interest_rate * dt)
+
+        # Find the size of the moves and their probabilities, ordered from
+        # the highest to the lowest move
+        if method == 'binomial':
+            # The Cox-Ross-Rubinstein lattice, with one node more per step
+            up = math.exp(volatility * math.sqrt(dt))
+            p_up = (growth - 1 / up) / (up - 1 / up)
+            probabilities = [p_up, 1 - p_up]
+            spacing = 2
+        else:
+            # The trinomial lattice matching the moments of two binomial
+            # half-steps, with two nodes more per step
+            up = math.exp(volatility * math.sqrt(2 * dt))
+            half_up = math.exp(volatility * math.sqrt(dt / 2))
+            half_growth = math.exp((interest_rate
+                                    - self.underlying.dividend_yield) * dt / 2)
+            p_up = ((half_growth - 1 / half_up) / (half_up - 1 / half_up))**2
+            p_down = ((half_up - half_growth) / (half_up - 1 / half_up))**2
+            probabilities = [p_up, 1 - p_up - p_down, p_down]
+            spacing = 1
+        if min(probabilities) <= 0:
+            raise ValueError(f"{steps = } is too few for the probabilities of \
+                             the lattice to be positive")
+        moves = len(probabilities) - 1
+
+        # The steps at which the option can be exercised
+        exercise_steps = {max(1, round(time / dt))
+                          for time in self.exercise_times}
+        sign = 1 if self.option_type == 'call' else -1
+
+        def prices(n):
+            # The prices of the nodes after n steps, from highest to lowest,
+            # which are spacing powers of up apart
+            return self.underlying.current_price \
+                * up ** (n - spacing * np.arange(moves * n + 1))
+
+        # At maturity the value is the payoff, and each slice before it is the
+        # discounted expected value of the next slice, or the payoff if the
+        # option can be exercised and that is greater
+        values = np.maximum(sign * (prices(steps) - self.strike_price), 0)
+        for n in range(steps - 1, -1, -1):
+            values = discount * sum(probability
+                                    * values[i:len(values) - moves + i]
+                                    for i, probability in
+                                    enumerate(probabilities))
+            if n in exercise_steps:
+                values = np.maximum(values, sign * (prices(n)
+                                                    - self.strike_price))
+        return float(values[0])
+
+    @staticmethod
+    def _mesh_densities(current_prices, next_prices, drift, deviation):
+        """Find the unnormalised Black-Scholes transition densities.
+
+        The densities exp(-z**2/2) of the standardised log-returns are missing
+        the factor 1/(sqrt(2*pi)*deviation*next_price), which is the same for
+        every transition into the same next price, and so cancels in the mesh
+        weights.
+
+        Parameters
+        ----------
+        current_prices, next_prices : float or numpy.ndarray
+            The prices at the start and end of the transitions, which are
+            broadcast against each other.
+        drift, deviation : float
+            The mean and standard deviation of the log-returns.
+
+        Returns
+        -------
+        numpy.ndarray
+            The unnormalised densities.
+        """
+        z = (np.log(next_prices / current_prices) - drift) / deviation
+        return np.exp(-z**2 / 2)
+
+    def tree_estimates(self, tree, branches, interest_rate, stats=None,
+                       discounts=None):
+        """Calculate the high and low estimates at the initial node of a tree.
+
+        Parameters
+        ----------
+        tree : dict
+            A tree of node sequences and asset prices, as generated by
+            tree_generator.
+        branches : int
+            The (whole) number of branches (at least 2) each non-terminal node
+            in the tree has.
+        interest_rate : int or float
+            The risk-free interest_rate.
+        stats : PricingStats, optional
+            If provided, the payoffs are counted, and the 'payoff' and
+            'induction' phases are timed. This is defaulted to None.
+        discounts : list of floats, optional
+            The discount factor from each level of the tree to the next. This
+            is defaulted to None, where they are found from the interest_rate.
+
+        Returns
+        -------
+        tuple
+            The high and low estimate at the initial node ().
+        """
+        lap = _stats_lap(stats)
+        # Since 0 can never be an exercise time, the payoff at the initial
+        # node is zero, and all other nodes will have their payoff calculated
+        payoff_tree = {node_seq: self.payoff(value) if len(node_seq) > 0
+                       else 0 for node_seq, value in tree.items()}
+        lap('payoff')
+        High_tree = {}
+        Low_tree = {}
+
+        # Find the discount factor of each level once, where deltak
+        # represents the time between the level and the next exercise time
+        if discounts is None:
+            discounts = []
+            for k in range(len(self.exercise_times)):
+                if k > 0:
+                    deltak = (self.exercise_times[k]
+                              - self.exercise_times[k-1])
+                else:
+                    deltak = self.exercise_times[0]
+                discounts.append(math.exp(-1 * interest_rate * deltak))
+
+        # Iterate through the node sequences of the tree in reverse.
+        for node_seq in reversed(tree):
+
+            # The next if else statement separates the terminal and
+            # non-terminal nodes
+            if len(node_seq) == len(self.exercise_times):
+                # According to the instructions, the high and low estimates
+                # are equal to the payoff at the terminal nodes
+                High_tree[node_seq] = payoff_tree[node_seq]
+                Low_tree[node_seq] = payoff_tree[node_seq]
+
+            # Now the non-terminal nodes
+            else:
+                discount = discounts[len(node_seq)]
+
+                sum_low_hat = 0
+                sum_high_next_node_seq = 0
+                # Create generator that yields all possible nodes from the
+                # node currently in the reverse iteration
+                next_node_seq = [node_seq + (a,) for a in range(branches)]
+                sum_low = sum(Low_tree[a] for a in next_node_seq)
+                # Iterate through each possible node in the generator
+                for a in next_node_seq:
+                    sum_high_next_node_seq += High_tree[a]
+                    # The average of the low estimates of all possible nodes
+                    # apart from the node currently in the iteration
+                    average_low_prime = (discount / (branches-1)) \
+                        * (sum_low - Low_tree[a])
+                    # Determine which value the low_hat should be at each a
+                    if average_low_prime <= payoff_tree[node_seq]:
+                        low_hat = payoff_tree[node_seq]
+                    else:
+                        low_hat = discount * Low_tree[a]
+                    sum_low_hat += low_hat
+                # Implement the max function as instructed from the problem
+                High_tree[node_seq] = max(payoff_tree[node_seq],
+                                          (discount / branches)
+                                          * sum_high_next_node_seq)
+                # Find the low estimate by averaging the low_hats
+                Low_tree[node_seq] = (1 / branches) * sum_low_hat
+
+        lap('induction')
+        if stats is not None:
+            stats.count('payoffs', len(tree) - 1)
+        return High_tree[()], Low_tree[()]
+
+    def greeks(self, branches, simulations, *, confidence_level=0.95,
+               interest_rate, price_bump=0.01, volatility_bump=0.01):
+        """Estimate the value, delta, gamma and vega of the option.
+
+        Each simulation generates one price tree, and the trees of the bumped
+        current price and volatility are generated from the same random
+        numbers, by restoring the state of the random number generators. The
+        differences between the estimates of the bumped and unbumped trees
+        are then far less noisy than those of independent simulations. The
+        trees of the bumped current prices are the unbumped tree scaled, since
+        the simulated prices are proportional to the current price.
+
+        Parameters
+        ----------
+        branches : int
+            The (whole) number of branches (at least 2) each non-terminal node
+            in the tree has.
+        simulations : int
+            The (whole) number of Monte-Carlo simulations (at least 2) to
+            perform.
+        confidence_level : float, optional
+            The confidence level for the (approximate) confidence intervals,
+            which should be a number strictly between 0 and 1, with default
+            value 0.95.
+        interest_rate : int or float
+            The risk-free interest_rate.
+        price_bump : float, optional
+            The relative bump of the current price for delta and gamma, with
+            default value 0.01 (i.e. 1%).
+        volatility_bump : float, optional
+            The absolute bump of the volatility for vega, with default value
+            0.01.
+
+        Returns
+        -------
+        dict
+            The 'value' as returned by value_estimate, and the 'delta',
+            'gamma' and 'vega' as tuples of the lower confidence limit, point
+            estimate and upper confidence limit, where each simulation's
+            estimate is the average of its high and low estimates.
+
+        Raises
+        ------
+        ValueError
+            If branches is not an integer is not more than or equal to two.
+            If simulations is not an integer is not more than or equal to two.
+            If confidence_interval is not a float or does not lie strictly
+            between zero and one.
+            If the interest_rate is not an integer or float or is less than or
+            equal to zero
+            If price_bump or volatility_bump is not a positive number, or if
+            volatility_bump is not less than the volatility.
+        """
+        # Check attributes and raise appropiate errors
+        if not isinstance(branches, int) or branches < 2:
+            raise ValueError(f"{branches = } must be an integer of at least 2")
+        if not isinstance(simulations, int) or simulations < 2:
+            raise ValueError(f"{simulations = } must be an integer of at \
+                             least 2")
+        if not isinstance(confidence_level, float) or not (0 < confidence_level
+                                                           < 1):
+            raise ValueError(f"{confidence_level = } must be anumber strictly \
+                             between 0 and 1")
+        if not isinstance(interest_rate, (int, float)) or interest_rate <= 0:
+            raise ValueError(f"{interest_rate = } must be a positive number")
+        if not isinstance(price_bump, (int, float)) or not (0 < price_bump
+                                                            < 1):
+            raise ValueError(f"{price_bump = } must be a number strictly \
+                             between 0 and 1")
+        if not isinstance(volatility_bump, (int, float)) or not (
+                0 < volatility_bump < self.underlying.volatility):
+            raise ValueError(f"{volatility_bump = } must be a positive number \
+                             less than the volatility")
+
+        # Create copies of the option whose underlying assets have the bumped
+        # volatilities
+        bumped_options = []
+        for bump in [volatility_bump, -volatility_bump]:
+            underlying = copy.copy(self.underlying)
+            underlying.volatility = self.underlying.volatility + bump
+            bumped_option = copy.copy(self)
+            bumped_option.underlying = underlying
+            bumped_options.append(bumped_option)
+
+        # Create empty lists for the estimates of each simulation
+        High_initial_node = []
+        Low_initial_node = []
+        deltas = []
+        gammas = []
+        vegas = []
+        current_price = self.underlying.current_price
+        for sim in range(simulations):
+            # Save the state of the random number generators, so that the
+            # bumped trees are generated from the same random numbers
+            random_state = self._random_state()
+            tree = self.tree_generator(branches, interest_rate)
+            high, low = self.tree_estimates(tree, branches, interest_rate)
+            High_initial_node.append(high)
+            Low_initial_node.append(low)
+
+            # Scale the tree for the bumped current prices
+            estimates = []
+            for bump in [price_bump, -price_bump]:
+                bumped_tree = {node_seq: price * (1 + bump)
+                               for node_seq, price in tree.items()}
+                estimates.append(sum(self.tree_estimates(
+                    bumped_tree, branches, interest_rate)) / 2)
+
+            # Generate the trees for the bumped volatilities from the restored
+            # random state, which is left as it was after the unbumped tree
+            end_random_state = self._random_state()
+            for bumped_option in bumped_options:
+                self._set_random_state(random_state)
+                bumped_tree = bumped_option.tree_generator(branches,
+                                                           interest_rate)
+                estimates.append(sum(bumped_option.tree_estimates(
+                    bumped_tree, branches, interest_rate)) / 2)
+            self._set_random_state(end_random_state)
+
+            # Central finite differences of the estimates of this simulation
+            price_up, price_down, vol_up, vol_down = estimates
+            price_step = current_price * price_bump
+            deltas.append((price_up - price_down) / (2 * price_step))
+            gammas.append((price_up - (high + low) + price_down)
+                          / price_step**2)
+            vegas.append((vol_up - vol_down) / (2 * volatility_bump))
+
+        # Find the value estimate as in value_estimate, and the confidence
+        # intervals of the Greeks
+        z = statistics.NormalDist(0, 1).inv_cdf((1 + confidence_level) / 2)
+        L_mean = np.mean(Low_initial_node)
+        H_mean = np.mean(High_initial_node)
+        results = {'value': (L_mean - z * np.std(Low_initial_node)
+                             / math.sqrt(simulations),
+                             (H_mean + L_mean) / 2,
+                             H_mean + z * np.std(High_initial_node)
+                             / math.sqrt(simulations))}
+        for name, estimates in [('delta', deltas), ('gamma', gammas),
+                                ('vega', vegas)]:
+            mean = np.mean(estimates)
+            half_width = z * np.std(estimates) / math.sqrt(simulations)
+            results[name] = (mean - half_width, mean, mean + half_width)
+        return results
+
+    def branch_convergence(self, branch_counts, simulations, *,
+                           confidence_level=0.95, interest_rate,
+                           decay_power=None):
+        """Extrapolate the high and low estimates to unlimited branches.
+
+        The high and low estimators are biased (upwards and downwards) by
+        amounts that shrink as the number of branches grows, roughly in
+        proportion to 1 / branches**decay_power. The bias of the high
+        estimator is of order 1 / branches, while that of the low estimator
+        shrinks faster, close to 1 / branches**2 for the usual puts. Each
+        simulation generates a tree for each of the branch counts from the
+        same random state, as in greeks, and its high and low estimates are
+        fitted by least squares to limit + bias / branches**decay_power. The
+        limits of the simulations then give the extrapolated bounds as in
+        value_estimate, so that a few small trees can stand in for one very
+        large tree. A power larger than the true one under-corrects the
+        bias, leaving the bounds conservative, while a smaller one
+        overshoots. The low limit of each simulation is never taken above
+        its high limit, so the point estimate always lies within the
+        bounds. The low estimates of two branches are far more biased than
+        the rest, so the branch counts should start from three.
+
+        Parameters
+        ----------
+        branch_counts : list of ints
+            The (whole) numbers of branches (at least 2) of the trees, with at
+            least two different counts.
+        simulations : int
+            The (whole) number of Monte-Carlo simulations (at least 2) to
+            perform.
+        confidence_level : float, optional
+            The confidence level for the (approximate) confidence intervals,
+            which should be a number strictly between 0 and 1, with default
+            value 0.95.
+        interest_rate : int or float
+            The risk-free interest_rate.
+        decay_power : int, float or tuple, optional
+            The power of the number of branches that the biases decay with,
+            or a tuple of the powers of the high and low estimators. This is
+            defaulted to None, where the powers are 1 and 2. (Fitting the
+            powers to the mean estimates as well is too noisy, and often
+            overshoots.)
+
+        Returns
+        -------
+        dict
+            The extrapolated 'value' as the minimum, point and maximum value
+            estimate, the extrapolated 'high' and 'low' estimates as tuples of
+            the lower confidence limit, point estimate and upper confidence
+            limit, the 'decay_power' and average fitted 'bias' coefficients
+            of the high and low estimates, and the 'table' of the
+            convergence, with a dict for each
+            branch count of its 'branches', the mean 'high' and 'low'
+            estimates and their standard errors 'high_error' and
+            'low_error', the 'nodes' in each tree and the total 'seconds'.
+
+        Raises
+        ------
+        ValueError
+            If branch_counts is not a list of integers of at least two, with
+            at least two different counts.
+            If simulations is not an integer is not more than or equal to two.
+            If confidence_interval is not a float or does not lie strictly
+            between zero and one.
+            If the interest_rate is not an integer or float or is less than or
+            equal to zero
+            If decay_power is not a positive number or a tuple of two
+            positive numbers.
+        """
+        # Check attributes and raise appropiate errors
+        if not isinstance(branch_counts, (list, tuple)) or len(
+                set(branch_counts)) < 2 or not all(
+                isinstance(branches, int) and branches >= 2
+                for branches in branch_counts):
+            raise ValueError(f"{branch_counts = } must be a list of at least \
+                             two different integers of at least 2")
+        if not isinstance(simulations, int) or simulations < 2:
+            raise ValueError(f"{simulations = } must be an integer of at \
+                             least 2")
+        if not isinstance(confidence_level, float) or not (0 < confidence_level
+                                                           < 1):
+            raise ValueError(f"{confidence_level = } must be anumber strictly \
+                             between 0 and 1")
+        if not isinstance(interest_rate, (int, float)) or interest_rate <= 0:
+            raise ValueError(f"{interest_rate = } must be a positive number")
+        if isinstance(decay_power, (int, float)):
+            decay_power = (decay_power, decay_power)
+        if decay_power is not None and (
+                not isinstance(decay_power, tuple) or len(decay_power) != 2
+                or not all(isinstance(power, (int, float)) and power > 0
+                           for power in decay_power)):
+            raise ValueError(f"{decay_power = } must be a positive number or \
+                             a tuple of two positive numbers")
+
+        # The trees are generated in increasing size, so that the random
+        # state is left after the largest tree of each simulation
+        branch_counts = sorted(set(branch_counts))
+        Highs = np.empty((simulations, len(branch_counts)))
+        Lows = np.empty((simulations, len(branch_counts)))
+        seconds = [0] * len(branch_counts)
+        for sim in range(simulations):
+            random_state = self._random_state()
+            for j, branches in enumerate(branch_counts):
+                self._set_random_state(random_state)
+                start_time = time.perf_counter()
+                tree = self.tree_generator(branches, interest_rate)
+                Highs[sim, j], Lows[sim, j] = self.tree_estimates(
+                    tree, branches, interest_rate)
+                seconds[j] += time.perf_counter() - start_time
+
+        # Fit the limit and bias of every simulation at once, since the
+        # fitted values are linear in the estimates
+        if decay_power is None:
+            decay_power = (1, 2)
+        fits = []
+        for estimates, power in zip([Highs, Lows], decay_power):
+            design = np.column_stack([np.ones(len(branch_counts)),
+                                      np.array(branch_counts, dtype=float)
+                                      ** -power])
+            fits.append((power, *np.linalg.lstsq(design, estimates.T,
+                                                 rcond=None)[0]))
+        (High_power, High_limits, High_biases), \
+            (Low_power, Low_limits, Low_biases) = fits
+        # As the low estimator is biased down and the high estimator up, a low
+        # limit above the high limit has overshot
+        Low_limits = np.minimum(Low_limits, High_limits)
+
+        # Find the confidence intervals of the limits as in greeks, and the
+        # value estimate from them as in value_estimate
+        z = statistics.NormalDist(0, 1).inv_cdf((1 + confidence_level) / 2)
+        results = {}
+        for name, limits in [('high', High_limits), ('low', Low_limits)]:
+            mean = np.mean(limits)
+            half_width = z * np.std(limits) / math.sqrt(simulations)
+            results[name] = (mean - half_width, mean, mean + half_width)
+        results['value'] = (results['low'][0],
+                            (results['high'][1] + results['low'][1]) / 2,
+                            results['high'][2])
+        results['decay_power'] = (High_power, Low_power)
+        results['bias'] = (np.mean(High_biases), np.mean(Low_biases))
+        results['table'] = [
+            {'branches': branches,
+             'high': np.mean(Highs[:, j]), 'low': np.mean(Lows[:, j]),
+             'high_error': np.std(Highs[:, j]) / math.sqrt(simulations),
+             'low_error': np.std(Lows[:, j]) / math.sqrt(simulations),
+             'nodes': sum(branches**k for k in
+                          range(len(self.exercise_times) + 1)),
+             'seconds': seconds[j]}
+            for j, branches in enumerate(branch_counts)]
+        return results
+
+    def _random_state(self):
+        """Return the states of every generator the simulations may use."""
+        return (random.getstate(), np.random.get_state(),
+                [(rng, rng.getstate()) for rng in {
+                    id(rng): rng for rng in [self.rng, self.underlying.rng]
+                    if rng is not None}.values()])
+
+    def _set_random_state(self, state):
+        """Restore the states returned by _random_state."""
+        random_state, np_random_state, rng_states = state
+        random.setstate(random_state)
+        np.random.set_state(np_random_state)
+        for rng, rng_state in rng_states:
+            rng.setstate(rng_state)
+
+    def tree_generator(self, branches, interest_rate, stats=None):
         """Generate a tree of node sequences and their corresponding prices.
 
         Parameters
@@ -634,6 +2196,9 @@ class BermudanOption:
             in the tree has.
         interest_rate : int or float
             The risk-free interest_rate.
+        stats : PricingStats, optional
+            If provided, the nodes and simulated prices are counted, and the
+            'tree_generator' phase is timed. This is defaulted to None.
 
         Returns
         -------
@@ -655,6 +2220,7 @@ class BermudanOption:
 
         # Create an empyt dictionary which will eventually store the node
         # sequences and their corresponding asset prices
+        lap = _stats_lap(stats)
         tree = {}
 
         # Call the instance of SimulatedAsset to obtain the current price of
@@ -681,8 +2247,15 @@ class BermudanOption:
                     next_price = self.underlying.\
                         simulate_next_price(deltak,
                                             interest_rate=interest_rate,
-                                            current_price=tree[node_seq])
+                                            current_price=tree[node_seq],
+                                            rng=self.rng)
                     tree[node_seq + (i,)] = next_price
+
+        # Every node except the initial node is a simulated price
+        lap('tree_generator')
+        if stats is not None:
+            stats.count('nodes', len(tree))
+            stats.count('simulate_next_price', len(tree) - 1)
         return tree
 
     def generate_node_sequences(self, k, branches):
@@ -712,3 +2285,382 @@ class BermudanOption:
             for seq in self.generate_node_sequences(k-1, branches):
                 for i in range(branches):
                     yield seq + (i,)
+
+
+def portfolio_value_estimate(options, branches, simulations, *,
+                             confidence_level=0.95, interest_rate):
+    """Calculate the value estimates of many options on one shared tree.
+
+    The options must share the same underlying asset and exercise times, but
+    may have different strike prices and types. Each simulation generates a
+    single price tree, and the high and low estimates of every option are
+    calculated on that tree, level by level, for all the options at once.
+
+    Parameters
+    ----------
+    options : list of BermudanOption
+        A non-empty list of options with the same underlying and
+        exercise_times.
+    branches : int
+        The (whole) number of branches (at least 2) each non-terminal node
+        in the tree has.
+    simulations : int
+        The (whole) number of Monte-Carlo simulations (at least 2) to
+        perform.
+    confidence_level : float, optional
+        The confidence level for the (conservative, approximate) confidence
+        interval, which should be a number strictly between 0 and 1, with
+        default value 0.95.
+    interest_rate : int or float
+        The risk-free interest_rate.
+
+    Returns
+    -------
+    list of tuple
+        The minimum, point and maximum value estimate of each option, as
+        returned by BermudanOption.value_estimate.
+
+    Raises
+    ------
+    TypeError
+        If options is not a non-empty list of BermudanOption.
+    ValueError
+        If the options do not share the same underlying and exercise_times.
+        If branches is not an integer is not more than or equal to two.
+        If simulations is not an integer is not more than or equal to two.
+        If confidence_interval is not a float or does not lie strictly
+        between zero and one.
+        If the interest_rate is not an integer or float or is less than or
+        equal to zero
+    """
+    # Check variables and raise appropiate errors
+    if not isinstance(options, list) or len(options) == 0 or not all(
+            isinstance(option, BermudanOption) for option in options):
+        raise TypeError(f"{options = } must be a non-empty list of \
+                        BermudanOption")
+    for option in options:
+        if option.underlying is not options[0].underlying or \
+                option.exercise_times != options[0].exercise_times:
+            raise ValueError("options must share the same underlying and \
+                             exercise_times")
+    if not isinstance(branches, int) or branches < 2:
+        raise ValueError(f"{branches = } must be an integer of at least 2")
+    if not isinstance(simulations, int) or simulations < 2:
+        raise ValueError(f"{simulations = } must be an integer of at \
+                         least 2")
+    if not isinstance(confidence_level, float) or not (0 < confidence_level
+                                                       < 1):
+        raise ValueError(f"{confidence_level = } must be anumber strictly \
+                         between 0 and 1")
+    if not isinstance(interest_rate, (int, float)) or interest_rate <= 0:
+        raise ValueError(f"{interest_rate = } must be a positive number")
+
+    # The strike prices and the signs of the payoffs (1 for calls and -1 for
+    # puts) as columns, so that the payoffs of every option are found at once
+    strike_prices = np.array([[option.strike_price] for option in options],
+                             dtype=float)
+    signs = np.array([[1.0 if option.option_type == 'call' else -1.0]
+                      for option in options])
+    exercise_times = options[0].exercise_times
+
+    # Create arrays where the high and low estimates at the initial node of
+    # each simulation (rows) and option (columns) will be added
+    High_initial_node = np.empty((simulations, len(options)))
+    Low_initial_node = np.empty((simulations, len(options)))
+    for sim in range(simulations):
+        tree = options[0].tree_generator(branches, interest_rate)
+        High_initial_node[sim], Low_initial_node[sim] = _level_estimates(
+            _tree_levels(tree, len(exercise_times), branches), strike_prices,
+            signs, exercise_times, branches, interest_rate)
+
+    # Find the minimum, point and maximum estimate of each option using the
+    # same formula as BermudanOption.value_estimate
+    z = statistics.NormalDist(0, 1).inv_cdf((1 + confidence_level) / 2)
+    L_mean = np.mean(Low_initial_node, axis=0)
+    H_mean = np.mean(High_initial_node, axis=0)
+    V_min = L_mean - z * np.std(Low_initial_node, axis=0) \
+        / math.sqrt(simulations)
+    point_estimate = (H_mean + L_mean) / 2
+    V_max = H_mean + z * np.std(High_initial_node, axis=0) \
+        / math.sqrt(simulations)
+    return list(zip(V_min, point_estimate, V_max))
+
+
+def _tree_levels(tree, levels, branches):
+    """Split a tree of node sequences into arrays of prices by level.
+
+    The tree generator adds the node sequences level by level in
+    lexicographic order, so the children of the j-th node of a level are the
+    nodes j*branches to (j+1)*branches - 1 of the next level.
+
+    Parameters
+    ----------
+    tree : dict
+        A tree of node sequences and asset prices, as generated by
+        BermudanOption.tree_generator.
+    levels : int
+        The number of exercise times.
+    branches : int
+        The number of branches each non-terminal node in the tree has.
+
+    Returns
+    -------
+    list of numpy.ndarray
+        The prices of the nodes at each level, starting with the initial
+        node.
+    """
+    prices = np.fromiter(tree.values(), dtype=float, count=len(tree))
+    offsets = np.cumsum([branches**k for k in range(levels)])
+    return np.split(prices, offsets)
+
+
+def _level_estimates(levels, strike_prices, signs, exercise_times, branches,
+                     interest_rate):
+    """Calculate the high and low estimates of many options on one tree.
+
+    Parameters
+    ----------
+    levels : list of numpy.ndarray
+        The prices of the nodes at each level, as returned by _tree_levels.
+    strike_prices, signs : numpy.ndarray
+        Columns of the strike prices of the options, and the signs of their
+        payoffs (1 for calls and -1 for puts).
+    exercise_times : list of ints or floats
+        The exercise times shared by the options.
+    branches : int
+        The number of branches each non-terminal node in the tree has.
+    interest_rate : int or float
+        The risk-free interest_rate.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The high and low estimates at the initial node of each option.
+    """
+    # At the terminal nodes, the high and low estimates are equal to the
+    # payoffs (with a row for each option)
+    High = np.maximum(signs * (levels[-1] - strike_prices), 0)
+    Low = High
+    for k in range(len(exercise_times) - 1, -1, -1):
+        # Since 0 can never be an exercise time, the payoff at the initial
+        # node is zero
+        if k > 0:
+            payoff = np.maximum(signs * (levels[k] - strike_prices), 0)
+            deltak = exercise_times[k] - exercise_times[k-1]
+        else:
+            payoff = np.zeros((len(strike_prices), 1))
+            deltak = exercise_times[0]
+        discount = math.exp(-1 * interest_rate * deltak)
+
+        # Group the estimates of the next level by their parent node
+        High_next = High.reshape(len(strike_prices), -1, branches)
+        Low_next = Low.reshape(len(strike_prices), -1, branches)
+        High = np.maximum(payoff, discount * High_next.mean(axis=2))
+
+        # Each low_hat compares the payoff with the average of the other
+        # branches' low estimates
+        average_low_prime = discount / (branches-1) \
+            * (Low_next.sum(axis=2, keepdims=True) - Low_next)
+        low_hat = np.where(average_low_prime <= payoff[:, :, np.newaxis],
+                           payoff[:, :, np.newaxis], discount * Low_next)
+        Low = low_hat.mean(axis=2)
+    return High[:, 0], Low[:, 0]
+
+
+# The Vasicek project, once it is loaded by _vasicek_sim
+_vasicek = None
+
+
+def _vasicek_sim(*args, **kwargs):
+    """Call vasicek_sim, loading it from its project the first time.
+
+    The project's filename contains spaces, so it is loaded from the file
+    next to this one rather than imported by name.
+    """
+    global _vasicek
+    if _vasicek is None:
+        spec = importlib.util.spec_from_file_location(
+            'vasicek', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    'Simulated Interest Rate Paths (Vasicek '
+                                    'Model).py'))
+        _vasicek = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_vasicek)
+    return _vasicek.vasicek_sim(*args, **kwargs)
+
+
+def _shared_tree_arrays(buffer, nodes, subtrees):
+    """Return the arrays of a tree held in a shared memory buffer.
+
+    Parameters
+    ----------
+    buffer : memoryview
+        The buffer of the shared memory.
+    nodes : int
+        The number of nodes in the tree.
+    subtrees : int
+        The number of nodes at the split level.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The prices of the nodes in level order, the normal variates of every
+        node but the initial node, and the high and low estimates of the
+        nodes at the split level.
+    """
+    data = np.ndarray((2*nodes - 1 + 2*subtrees,), dtype=float,
+                      buffer=buffer)
+    return (data[:nodes], data[nodes:2*nodes - 1],
+            data[2*nodes - 1:2*nodes - 1 + subtrees],
+            data[2*nodes - 1 + subtrees:])
+
+
+def _deltak(exercise_times, k):
+    """Return the time between the kth level of a tree and the next."""
+    if k == 0:
+        return exercise_times[0]
+    return exercise_times[k] - exercise_times[k-1]
+
+
+def _payoffs(prices, params):
+    """Return the payoffs of an array of prices."""
+    if params['option_type'] == 'call':
+        return np.maximum(prices - params['strike_price'], 0.0)
+    return np.maximum(params['strike_price'] - prices, 0.0)
+
+
+def _simulate_level(parent_prices, normals, params, k):
+    """Simulate the prices of the children of nodes at the kth level.
+
+    The operations are those of BlackScholesAsset.simulate_next_price, in
+    the same order, so the prices are exactly those of tree_generator.
+
+    Parameters
+    ----------
+    parent_prices : numpy.ndarray
+        The prices of the parent nodes.
+    normals : numpy.ndarray
+        The standard normal variates of the children, in level order.
+    params : dict
+        The parameters of the tree, as made by parallel_value_estimate.
+    k : int
+        The level of the parent nodes.
+
+    Returns
+    -------
+    numpy.ndarray
+        The prices of the children, in level order.
+    """
+    time = _deltak(params['exercise_times'], k)
+    arguments = params['drift']*time + params['volatility'] \
+        * (math.sqrt(time) * normals)
+    # math.exp is used rather than np.exp, whose results can differ in the
+    # last bit
+    growth = np.array([math.exp(x) for x in arguments.tolist()])
+    return np.repeat(parent_prices, params['branches']) * growth
+
+
+def _induct_level(prices, High_next, Low_next, params, k):
+    """Calculate the high and low estimates of nodes at the kth level.
+
+    The operations are those of BermudanOption.tree_estimates, in the same
+    order, so the estimates are exactly the same.
+
+    Parameters
+    ----------
+    prices : numpy.ndarray
+        The prices of the nodes.
+    High_next, Low_next : numpy.ndarray
+        The high and low estimates of their children, in level order.
+    params : dict
+        The parameters of the tree, as made by parallel_value_estimate.
+    k : int
+        The level of the nodes.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The high and low estimates of the nodes.
+    """
+    branches = params['branches']
+    # Since 0 can never be an exercise time, the payoff at the initial node
+    # is zero
+    if k > 0:
+        payoff = _payoffs(prices, params)
+    else:
+        payoff = np.zeros(len(prices))
+    discount = math.exp(-1 * params['interest_rate']
+                        * _deltak(params['exercise_times'], k))
+    High_next = High_next.reshape(-1, branches)
+    Low_next = Low_next.reshape(-1, branches)
+
+    # The sums are accumulated a branch at a time, as the built-in sum does
+    sum_low = Low_next[:, 0]
+    for a in range(1, branches):
+        sum_low = sum_low + Low_next[:, a]
+    sum_high_next_node_seq = np.zeros(len(prices))
+    sum_low_hat = np.zeros(len(prices))
+    for a in range(branches):
+        sum_high_next_node_seq = sum_high_next_node_seq + High_next[:, a]
+        average_low_prime = (discount / (branches-1)) \
+            * (sum_low - Low_next[:, a])
+        low_hat = np.where(average_low_prime <= payoff, payoff,
+                           discount * Low_next[:, a])
+        sum_low_hat = sum_low_hat + low_hat
+    high_estimate = (discount / branches) * sum_high_next_node_seq
+    High = np.where(high_estimate > payoff, high_estimate, payoff)
+    Low = (1 / branches) * sum_low_hat
+    return High, Low
+
+
+def _subtree_estimates(name, params, start, stop):
+    """Build and collapse a block of the subtrees of a shared tree.
+
+    The prices of the subtrees below the nodes start to stop (in level
+    order) of the split level are simulated into the shared tree, and the
+    high and low estimates of those nodes are written to it.
+
+    Parameters
+    ----------
+    name : str
+        The name of the shared memory of the tree.
+    params : dict
+        The parameters of the tree, as made by parallel_value_estimate.
+    start, stop : int
+        The first and (one past) the last node of the block.
+    """
+    shared = shared_memory.SharedMemory(name=name)
+    try:
+        _collapse_subtrees(shared.buf, params, start, stop)
+    finally:
+        shared.close()
+
+
+def _collapse_subtrees(buffer, params, start, stop):
+    """Build and collapse a block of subtrees, as in _subtree_estimates."""
+    prices, normals, High, Low = _shared_tree_arrays(
+        buffer, params['nodes'], params['subtrees'])
+    branches = params['branches']
+    split_level = params['split_level']
+    levels = len(params['exercise_times'])
+    offsets = params['offsets']
+
+    # The block of each level lies between the blocks of its parents'
+    # first and last children
+    def block(k):
+        scale = branches**(k - split_level)
+        return slice(offsets[k] + start*scale, offsets[k] + stop*scale)
+
+    for k in range(split_level, levels):
+        children = block(k + 1)
+        prices[children] = _simulate_level(
+            prices[block(k)],
+            normals[children.start - 1:children.stop - 1], params, k)
+
+    # At the terminal nodes, the high and low estimates are equal to the
+    # payoffs
+    High_next = Low_next = _payoffs(prices[block(levels)], params)
+    for k in range(levels - 1, split_level - 1, -1):
+        High_next, Low_next = _induct_level(prices[block(k)], High_next,
+                                            Low_next, params, k)
+    High[start:stop] = High_next
+    Low[start:stop] = Low_next
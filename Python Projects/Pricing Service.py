@@ -0,0 +1,606 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import importlib.util
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+import numpy as np
+
+# The projects are standalone scripts whose filenames contain spaces, so they
+# are loaded from their files rather than imported by name.
+PROJECTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_FILES = {
+    'bermudan': 'Bermudan Option Pricing Model.py',
+    'iv': 'Time Series - Implied Volatility.py',
+}
+_projects = {}
+
+
+def load_project(name):
+    """Load one of the projects as a module, once per process.
+
+    Parameters
+    ----------
+    name : str
+        The key of the project in PROJECT_FILES.
+
+    Returns
+    -------
+    module
+        The loaded project.
+    """
+    if name not in _projects:
+        spec = importlib.util.spec_from_file_location(
+            name, os.path.join(PROJECTS_DIR, PROJECT_FILES[name]))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _projects[name] = module
+    return _projects[name]
+
+
+def black_scholes_batch(requests):
+    """Price a batch of black_scholes requests in one vectorized call.
+
+    Parameters
+    ----------
+    requests : list of dict
+        The parameters of black_scholes() of each request.
+
+    Returns
+    -------
+    list of float
+        The price of each option.
+    """
+    iv = load_project('iv')
+    columns = _columns(requests, ['exercise_price', 'interest_rate',
+                                  'maturity_time', 'underlying_price',
+                                  'volatility'])
+    return iv.black_scholes_prices(
+        option_type=[request['option_type'] for request in requests],
+        **columns).tolist()
+
+
+def black_scholes_iv_batch(requests):
+    """Solve a batch of black_scholes_iv requests in one vectorized call.
+
+    Parameters
+    ----------
+    requests : list of dict
+        The option_price and parameters of black_scholes() (without
+        volatility) of each request.
+
+    Returns
+    -------
+    list of float
+        The implied volatility of each option, otherwise None.
+    """
+    iv = load_project('iv')
+    columns = _columns(requests, ['option_price', 'exercise_price',
+                                  'interest_rate', 'maturity_time',
+                                  'underlying_price'])
+    iv_values, _ = iv.black_scholes_iv_batch(
+        columns.pop('option_price'),
+        option_type=[request['option_type'] for request in requests],
+        **columns)
+    return [None if math.isnan(value) else value
+            for value in iv_values.tolist()]
+
+
+def _columns(requests, names):
+    """Return arrays of the named parameters of a batch of requests.
+
+    Raises
+    ------
+    ValueError
+        If a parameter is missing from a request.
+    """
+    columns = {}
+    for name in names:
+        try:
+            columns[name] = np.array([float(request[name])
+                                      for request in requests])
+        except KeyError:
+            raise ValueError(f'{name} must be given') from None
+    return columns
+
+
+def value_estimate_job(params):
+    """Price a Bermudan option with BermudanOption.value_estimate.
+
+    This runs in the worker processes, which each load the Bermudan project
+    once and keep it.
+
+    Parameters
+    ----------
+    params : dict
+        The current_price, volatility, dividend_yield (optional), and
+        jump_rate, jump_alpha and jump_beta (for a Merton asset) of the
+        underlying, the exercise_times, option_type and strike_price of the
+        option, and the branches, simulations, interest_rate,
+        confidence_level (optional) and seed (optional) of the estimate.
+
+    Returns
+    -------
+    list of float
+        The minimum, point and maximum value estimate.
+    """
+    bermudan = load_project('bermudan')
+    params = dict(params)
+    rng = bermudan.BufferedRNG(params.pop('seed', None))
+    asset_params = {'current_price': params.pop('current_price'),
+                    'volatility': params.pop('volatility'),
+                    'dividend_yield': params.pop('dividend_yield', 0),
+                    'rng': rng}
+    if 'jump_rate' in params:
+        asset = bermudan.MertonAsset(
+            'Underlying', jump_rate=params.pop('jump_rate'),
+            jump_alpha=params.pop('jump_alpha'),
+            jump_beta=params.pop('jump_beta'), **asset_params)
+    else:
+        asset = bermudan.BlackScholesAsset('Underlying', **asset_params)
+    option = bermudan.BermudanOption(
+        'Option', asset, exercise_times=params.pop('exercise_times'),
+        option_type=params.pop('option_type'),
+        strike_price=params.pop('strike_price'))
+    return [float(value) for value in option.value_estimate(
+        params.pop('branches'), params.pop('simulations'), **params)]
+
+
+class Batcher:
+    """A queue that coalesces requests into batches.
+
+    The first request of a batch waits for up to window seconds, or until
+    max_batch requests have arrived, and then the whole batch is priced by
+    one call of function. If the batch fails, each request is priced alone,
+    so that one bad request only fails itself. The calls run in the default
+    executor of the event loop, so that a large batch does not hold up the
+    other requests.
+
+    Parameters
+    ----------
+    function : function
+        A function of a list of requests that returns a list of results.
+    window : float
+        The time (in seconds) that a batch waits for more requests.
+    max_batch : int
+        The largest number of requests in a batch.
+
+    Attributes
+    ----------
+    batches : int
+        The number of batches priced.
+    batched_requests : int
+        The number of requests priced in batches.
+    """
+
+    def __init__(self, function, *, window, max_batch):
+        self.function = function
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.batched_requests = 0
+        self._pending = []
+        self._timer = None
+        # The batches being priced, which are kept until they are finished
+        self._tasks = set()
+
+    @property
+    def queue_depth(self):
+        """The number of requests waiting for their batch."""
+        return len(self._pending)
+
+    async def submit(self, request):
+        """Add a request to the next batch and return its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        """Start pricing the pending requests as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.batched_requests += len(batch)
+        task = asyncio.get_running_loop().create_task(self._price(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _price(self, batch):
+        """Price a batch, and set the futures of its requests."""
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                None, self.function, [request for request, _ in batch])
+        except Exception:
+            results = None
+        for i, (request, future) in enumerate(batch):
+            if future.done():
+                continue
+            if results is not None:
+                future.set_result(results[i])
+                continue
+            try:
+                result = await loop.run_in_executor(None, self.function,
+                                                    [request])
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            else:
+                if not future.done():
+                    future.set_result(result[0])
+
+
+class PricingService:
+    """A local pricing service of newline-delimited JSON requests.
+
+    Each request is a JSON object {"id": ..., "method": ..., "params":
+    {...}} on one line, and each response is {"id": ..., "result": ...} or
+    {"id": ..., "error": "..."} on one line, in the order they are finished.
+    The methods are 'black_scholes' and 'black_scholes_iv', which are
+    micro-batched into vectorized calls, 'value_estimate', which is run by a
+    pool of worker processes, and 'metrics'.
+
+    Parameters
+    ----------
+    window : float, optional
+        The time (in seconds) that a batch waits for more requests, which
+        defaults to 0.002.
+    max_batch : int, optional
+        The largest number of requests in a batch, which defaults to 4096.
+    workers : int, optional
+        The number of worker processes for value_estimate, which defaults to
+        the number of CPUs.
+    """
+
+    # The methods of the requests
+    methods = ['black_scholes', 'black_scholes_iv', 'value_estimate',
+               'metrics']
+
+    def __init__(self, *, window=0.002, max_batch=4096, workers=None):
+        self.batchers = {
+            'black_scholes': Batcher(black_scholes_batch, window=window,
+                                     max_batch=max_batch),
+            'black_scholes_iv': Batcher(black_scholes_iv_batch,
+                                        window=window, max_batch=max_batch),
+        }
+        self.workers = workers
+        self.pool = None
+        self.in_flight = 0
+        self.requests = collections.Counter()
+        self.errors = collections.Counter()
+        # The latencies (in seconds) of the latest requests of each method
+        self.latencies = collections.defaultdict(
+            lambda: collections.deque(maxlen=10000))
+        self.start_time = time.perf_counter()
+        # The projects are loaded now, so that no request waits for them
+        load_project('iv')
+        load_project('bermudan')
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start listening, and return the asyncio server."""
+        # The workers are spawned, since forking the threads of a running
+        # service can leave a worker deadlocked
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return await asyncio.start_server(self._handle_connection, host,
+                                          port, limit=2**24)
+
+    def close(self):
+        """Shut down the worker pool."""
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    async def call(self, method, params):
+        """Return the result of one request."""
+        if method in self.batchers:
+            return await self.batchers[method].submit(params)
+        if method == 'value_estimate':
+            self.in_flight += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.pool, value_estimate_job, params)
+            finally:
+                self.in_flight -= 1
+        if method == 'metrics':
+            return self.metrics()
+        raise ValueError(f'{method = } must be one of black_scholes, '
+                         'black_scholes_iv, value_estimate or metrics')
+
+    def metrics(self):
+        """Return the queue depths, batch sizes and latencies.
+
+        Returns
+        -------
+        dict
+            The 'uptime' (in seconds), the 'queue_depth' of each batcher
+            and the number of value_estimate jobs 'in_flight', the number
+            of 'batches' and the 'mean_batch_size' of each batcher, and the
+            'requests', 'errors' and latency percentiles (in milliseconds)
+            of each method, with the requests that cannot be parsed or have
+            an unknown method under 'invalid'.
+        """
+        methods = {}
+        for method, count in self.requests.items():
+            latencies = sorted(self.latencies[method])
+            methods[method] = {
+                'requests': count, 'errors': self.errors[method],
+                'latency_ms': {
+                    f'p{q}': 1000 * latencies[min(len(latencies) - 1,
+                                                  int(q / 100
+                                                      * len(latencies)))]
+                    for q in [50, 95, 99]} if latencies else {}}
+        return {'uptime': time.perf_counter() - self.start_time,
+                'queue_depth': {name: batcher.queue_depth
+                                for name, batcher in self.batchers.items()},
+                'in_flight': self.in_flight,
+                'batches': {name: batcher.batches
+                            for name, batcher in self.batchers.items()},
+                'mean_batch_size': {
+                    name: batcher.batched_requests / batcher.batches
+                    for name, batcher in self.batchers.items()
+                    if batcher.batches > 0},
+                'methods': methods}
+
+    async def _handle_connection(self, reader, writer):
+        """Answer the requests of one connection, concurrently."""
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            task = asyncio.create_task(self._handle_request(line, writer))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        writer.close()
+
+    async def _handle_request(self, line, writer):
+        """Answer one request line.
+
+        Requests that cannot be parsed or have an unknown method are counted
+        under 'invalid', rather than under a key of each bad method.
+        """
+        start_time = time.perf_counter()
+        request_id = None
+        method = 'invalid'
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            if request['method'] in self.methods:
+                method = request['method']
+            response = {'id': request_id,
+                        'result': await self.call(request['method'],
+                                                  request.get('params', {}))}
+        except Exception as error:
+            response = {'id': request_id,
+                        'error': f'{type(error).__name__}: {error}'}
+            self.errors[method] += 1
+        self.requests[method] += 1
+        self.latencies[method].append(time.perf_counter() - start_time)
+        writer.write(json.dumps(response).encode() + b'\n')
+        # Waiting for a slow client to read its responses keeps them from
+        # piling up in the write buffer
+        try:
+            await writer.drain()
+        except ConnectionError:
+            # The client has gone, so its response is dropped
+            pass
+
+
+class PricingClient:
+    """A client of a PricingService, which can send requests concurrently.
+
+    Parameters
+    ----------
+    host : str, optional
+        The host of the service, which defaults to '127.0.0.1'.
+    port : int
+        The port of the service.
+    """
+
+    def __init__(self, host='127.0.0.1', *, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+        self._futures = {}
+        self._next_id = 0
+        self._receiver = None
+
+    async def connect(self):
+        """Open the connection."""
+        self._reader, self._writer = await asyncio.open_connection(
+            self.host, self.port, limit=2**24)
+        self._receiver = asyncio.create_task(self._receive())
+
+    async def close(self):
+        """Close the connection once every response has arrived."""
+        if self._futures:
+            await asyncio.gather(*self._futures.values(),
+                                 return_exceptions=True)
+        # Half-closing lets the service finish before the connection closes
+        self._writer.write_eof()
+        await self._receiver
+        self._writer.close()
+        await self._writer.wait_closed()
+
+    async def call(self, method, **params):
+        """Send a request and return its result.
+
+        Raises
+        ------
+        RuntimeError
+            If the service answers with an error.
+        """
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._futures[request_id] = future
+        self._writer.write(json.dumps({'id': request_id, 'method': method,
+                                       'params': params}).encode() + b'\n')
+        return await future
+
+    async def _receive(self):
+        """Match each response to the future of its request."""
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._futures.pop(response['id'])
+            if 'error' in response:
+                future.set_exception(RuntimeError(response['error']))
+            else:
+                future.set_result(response['result'])
+
+
+async def serve(*, host='127.0.0.1', port=8765, **service_kwargs):
+    """Run a PricingService until it is interrupted."""
+    service = PricingService(**service_kwargs)
+    server = await service.start(host, port)
+    print(f'Pricing service listening on {host}:{port}')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+async def selftest(*, quotes=2000, **service_kwargs):
+    """Start a service and check its answers with a test client.
+
+    The client sends quotes black_scholes and black_scholes_iv requests and
+    two value_estimate requests all at once, and checks the results against
+    direct calls of the projects. It then checks that a black_scholes
+    request with a negative exercise price and a request with an unknown
+    method fail, and are counted as errors of black_scholes and 'invalid'.
+
+    Returns
+    -------
+    dict
+        The number of requests per second and the metrics of the service.
+
+    Raises
+    ------
+    AssertionError
+        If any result differs from the direct calls.
+    """
+    iv = load_project('iv')
+    service = PricingService(**service_kwargs)
+    server = await service.start()
+    client = PricingClient(port=server.sockets[0].getsockname()[1])
+    await client.connect()
+    try:
+        generator = random.Random(0)
+        quotes_params = [{'exercise_price': 100,
+                          'interest_rate': 0.05,
+                          'maturity_time': generator.uniform(0.1, 2),
+                          'option_type': generator.choice(['call', 'put']),
+                          'underlying_price': generator.uniform(80, 120)}
+                         for quote in range(quotes)]
+        volatilities = [generator.uniform(0.1, 0.5) for quote in range(quotes)]
+        bermudan_params = {'current_price': 100, 'volatility': 0.2,
+                           'exercise_times': [0.5, 1.0],
+                           'option_type': 'put', 'strike_price': 100,
+                           'branches': 8, 'simulations': 50,
+                           'interest_rate': 0.05, 'seed': 1}
+
+        start_time = time.perf_counter()
+        prices = await asyncio.gather(*[
+            client.call('black_scholes', volatility=volatility, **params)
+            for params, volatility in zip(quotes_params, volatilities)])
+        iv_values, bermudan_values = await asyncio.gather(
+            asyncio.gather(*[client.call('black_scholes_iv',
+                                         option_price=price, **params)
+                             for params, price in zip(quotes_params,
+                                                      prices)]),
+            asyncio.gather(*[client.call('value_estimate', **bermudan_params)
+                             for job in range(2)]))
+        seconds = time.perf_counter() - start_time
+
+        # Checking the answers against direct calls of the projects
+        for params, volatility, price, iv_value in zip(
+                quotes_params, volatilities, prices, iv_values):
+            assert math.isclose(price, iv.black_scholes(
+                volatility=volatility, **params), rel_tol=1e-9, abs_tol=1e-9)
+            assert iv_value is None or abs(iv_value - volatility) < 1e-6
+        assert bermudan_values[0] == bermudan_values[1]
+        assert value_estimate_job(bermudan_params) == bermudan_values[0]
+        for method, params in [('black_scholes',
+                                {'exercise_price': -1, 'interest_rate': 0.05,
+                                 'maturity_time': 1, 'option_type': 'call',
+                                 'underlying_price': 100, 'volatility': 0.2}),
+                               ('price', {})]:
+            try:
+                await client.call(method, **params)
+            except RuntimeError:
+                pass
+            else:
+                raise AssertionError(f'the {method} request must fail')
+        metrics = await client.call('metrics')
+        assert metrics['methods']['black_scholes']['errors'] == 1
+        assert metrics['methods']['invalid']['requests'] == 1
+        assert metrics['methods']['invalid']['errors'] == 1
+    finally:
+        await client.close()
+        server.close()
+        await server.wait_closed()
+        service.close()
+    return {'requests_per_second': (2 * quotes + 2) / seconds,
+            'metrics': metrics}
+
+
+def main(argv=None):
+    """Serve, or run the self-test, from the shell.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        The arguments, which default to those of the script.
+    """
+    parser = argparse.ArgumentParser(
+        description='Serve the pricers over a local socket.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help='run the service')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    selftest_parser = commands.add_parser(
+        'selftest', help='check the service with a test client')
+    selftest_parser.add_argument('--quotes', type=int, default=2000)
+    for command_parser in [serve_parser, selftest_parser]:
+        command_parser.add_argument('--window', type=float, default=0.002)
+        command_parser.add_argument('--max-batch', type=int, default=4096)
+        command_parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+    service_kwargs = {'window': args.window, 'max_batch': args.max_batch,
+                      'workers': args.workers}
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(host=args.host, port=args.port,
+                              **service_kwargs))
+        except KeyboardInterrupt:
+            pass
+    else:
+        results = asyncio.run(selftest(quotes=args.quotes, **service_kwargs))
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@ import random
 
 
 def vasicek_sim(initial, final_time, sim_path_len, num_paths=None, *, a, b,
-                sigma, allow_neg=True):
+                sigma, allow_neg=True, rng=None):
     """Return a number of historic, current and future interest rate paths.
 
     future interest rates are calculated using the Vasicek interest model and
@@ -28,6 +28,10 @@ def vasicek_sim(initial, final_time, sim_path_len, num_paths=None, *, a, b,
     allow_neg : bool, optional
         determines if negative interest rate are allowed and defaults to
         True.
+    rng : object, optional
+        the random number generator, which must have a gauss(mu, sigma)
+        method (such as random.Random or BufferedRNG), and defaults to
+        None, where the global generator of the random module is used.
 
     Returns
     -------
@@ -49,6 +53,8 @@ def vasicek_sim(initial, final_time, sim_path_len, num_paths=None, *, a, b,
     # function is called.
     if isinstance(initial, float):
         initial = [initial]
+    # Drawing the normal variables from the given generator, if any.
+    gauss = random.gauss if rng is None else rng.gauss
 
     # Implementation of the algorithm.
     # Loops for each path that needs to be simulated.
@@ -61,7 +67,7 @@ def vasicek_sim(initial, final_time, sim_path_len, num_paths=None, *, a, b,
         # Loops for each new future interest rate.
         for k in range(sim_path_len):
             # Creating the standard normal variable.
-            Z = random.gauss(0, 1)
+            Z = gauss(0, 1)
             # Implementation of the Vasicek model using the previous
             # interest rate.
             r = math.exp(-a*delta)*r + b*(1-math.exp(-a*delta)) + sigma\
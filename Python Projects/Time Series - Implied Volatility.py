@@ -1,14 +1,23 @@
+import concurrent.futures
+import contextlib
 import csv
+import itertools
+import json
 import math
+import os
+import shutil
 import statistics
+import struct
+import sys
+import threading
+import time
 import numpy as np
-import matplotlib.dates as pld
-import matplotlib.pyplot as plt
+from collections import OrderedDict
 from datetime import datetime
 
 
 def black_scholes(exercise_price, interest_rate, maturity_time, option_type,
-                  underlying_price, volatility):
+                  underlying_price, volatility, cache=None):
     """
     Return the price of an option using the Black-Scholes formula.
 
@@ -36,6 +45,9 @@ def black_scholes(exercise_price, interest_rate, maturity_time, option_type,
         market's view on the future variation of the underlying
         asset. This is assumed to be constant, annualised and
         represents a number, not a percentage.
+    cache : QuoteCache, optional
+        If given, the price is looked up in (and otherwise added to)
+        the cache. This defaults to None.
 
     Returns
     -------
@@ -62,6 +74,15 @@ def black_scholes(exercise_price, interest_rate, maturity_time, option_type,
                 f'{parameter_names[i]} = {param} must be positive')
     if option_type not in ['put', 'call']:
         raise TypeError(f'{option_type=} must be either "put" or "call"')
+    if cache is not None:
+        return cache.lookup(('price', exercise_price, interest_rate,
+                             maturity_time, option_type, underlying_price,
+                             volatility),
+                            lambda: black_scholes(exercise_price,
+                                                  interest_rate,
+                                                  maturity_time, option_type,
+                                                  underlying_price,
+                                                  volatility))
 
     # The two variables d1 and d2 needed for the option_price formula
     # are calculated.
@@ -87,17 +108,24 @@ def black_scholes(exercise_price, interest_rate, maturity_time, option_type,
 
 
 def time_series_iv(in_filename, out_filename, plot_filename=None, *,
-                   date_field, exercise_price, int_rate_field, iv_field,
-                   maturity_field, option_price_field, option_type,
-                   underlying_price_field):
+                   date_field, exercise_price=None, int_rate_field, iv_field,
+                   maturity_field, option_price_field, option_type=None,
+                   underlying_price_field, strike_field=None, type_field=None,
+                   warm_start=False,
+                   bracket_width=0.05, reseed_every=100,
+                   buffer_size=2**20, chunk_size=None, incremental=False,
+                   cache=None, binary_filename=None, stats=None):
     """
     Create new file with implied volatility and optional plot.
 
     The function processes a CSV file containing time series data of
-    a single European option and writes a new CSV file with an added
-    field for the implied volatility (as a percentage and
+    a single European option, or of a whole chain of European options
+    with a strike and type on each row, and writes a new CSV file with
+    an added field for the implied volatility (as a percentage and
     annualised), and can optionally output a graph of implied
-    volatility (on y-axis) against time (along x-axis).
+    volatility (on y-axis) against time (along x-axis). The input file
+    is parsed, solved, written and collected for the plot in a single
+    pass.
 
     Parameters
     ----------
@@ -106,141 +134,1721 @@ def time_series_iv(in_filename, out_filename, plot_filename=None, *,
     out_filename : str
         This is the filename of the output CSV file.
     plot_filename : str, optional
-        This is the filename of the optional plot. This has a default
-        of None, therefore if no filename is given, then plot is not
-        produced.
+        This is the filename of the optional plot, which is drawn by
+        plot_time_series_iv() once the output file has been written.
+        This has a default of None, therefore if no filename is given,
+        then plot is not produced.
     date_field : str
         This is the CSV field of the current date that each option is
         priced at.
-    exercise_price : int
-        This is the exercise price of every option in the CSV file.
+    exercise_price : int, optional
+        This is the exercise price of every option in the CSV file,
+        required unless strike_field is given.
     int_rate_field : str
         This is the CSV field of the annualised risk-free interest
         rate of each option (in %).
     iv_field : str
         This is the CSV field of the implied volatility of each
-        option (in %).
+        option (in %). Rows without an implied volatility are written
+        as nan.
     maturity_field : str
         This is the CSV field of the maturity time of each option
         (in days).
     option_price_field : str
         This is the CSV field of the price of the option.
-    option_type : str
+    option_type : str, optional
         This is the type of every option in the CSV file, either
-        'call' or 'put'.
+        'call' or 'put', required unless type_field is given.
     underlying_price_field : str
         This is the CSV field of the price of the underlying asset
         at that date.
+    strike_field : str, optional
+        This is the CSV field of the exercise price of each option,
+        used instead of exercise_price for option chains.
+    type_field : str, optional
+        This is the CSV field of the type of each option, either
+        'call' or 'put', used instead of option_type for option
+        chains. In columnar mode, the rows of each chunk are grouped by
+        date and maturity (together with the interest rate and price of
+        the underlying asset that they share), so that the discount
+        factor and forward price are computed once per group.
+    warm_start : bool, optional
+        If True, each row's implied volatility is solved within a tight
+        bracket around the previous row's implied volatility, which is
+        widened only if it does not contain a root. It cannot be used
+        with chunk_size. This defaults to False, where every row is
+        solved over the full interval (except in incremental mode).
+    bracket_width : float, optional
+        This is the initial relative half-width of the warm-start
+        bracket, which defaults to 0.05 (i.e. roughly 5% either side of
+        the previous implied volatility).
+    reseed_every : int, optional
+        When warm-starting, every reseed_every-th row is still solved
+        over the full interval, so that a poor warm start is not
+        carried on for more than reseed_every rows. This defaults to
+        100.
+    buffer_size : int, optional
+        This is the size (in bytes) of the write buffer of the output
+        file, which defaults to 1 MiB.
+    chunk_size : int, optional
+        If given, the input file is read in chunks of chunk_size rows
+        into typed NumPy arrays, the implied volatilities of each chunk
+        are solved in one batch and each chunk is written out in one
+        bulk operation. Every row is solved over the full interval, so
+        warm_start and cache cannot be given. This defaults to None,
+        where rows are processed one at a time.
+    incremental : bool, optional
+        If True, only the rows appended to the input file since the
+        last run are solved, warm-started from the last implied
+        volatility (whatever warm_start is, except in columnar mode),
+        and appended to the existing output file. The
+        position reached in the input file is kept in the state file
+        '<out_filename>.state', which is created on the first run. The
+        plot is then drawn from the whole output file. This defaults to
+        False.
+    cache : QuoteCache, optional
+        If given, rows whose quotes are already in the cache are not
+        solved again. It cannot be used with chunk_size. This defaults
+        to None.
+    binary_filename : str, optional
+        If given, the dates (as int64 days since 1970-01-01) and implied
+        volatilities (as float64, not in %) are also written to this
+        .npy file as a structured array, which load_iv_columns() maps
+        into memory without parsing. In incremental mode, the new rows
+        are appended to it. This defaults to None.
+    stats : PricingStats, optional
+        If given, the rows, function evaluations, root-finding calls
+        and iterations and cache hits are counted, and the 'read',
+        'solve' and 'write' phases of the rows (or 'read', 'prepare',
+        'solve' and 'write' of each chunk in columnar mode), the 'plot'
+        and the whole 'time_series_iv' are timed. This defaults to None.
 
     Returns
     -------
-    None
+    dict
+        The solver statistics of the file: the number of 'rows'
+        processed, the total number of function 'evaluations', the
+        number of 'cold_solves' (over the full interval) and
+        'warm_solves' (from the previous implied volatility) and the
+        'cold_evaluations' and 'warm_evaluations' they took, and the
+        'last_date' and 'last_iv' of the last row. The counts are
+        measured, not extrapolated: the cold solves (about one in every
+        reseed_every rows) are not a fair sample of every row, so the
+        evaluations saved by warm-starting should be found by comparing
+        with a run where warm_start is False.
 
     Raises
     ------
     Error
         If iv_field is a header in the input file.
-        If plot_filename is None.
     ValueError
         If any of the fields are not headers of the input file.
+        If not exactly one of exercise_price and strike_field, or of
+        option_type and type_field, is given.
+        If bracket_width is not positive, or reseed_every is not a
+        positive integer.
+        If warm_start or cache is given with chunk_size.
+        If the state file (or binary file) does not match the input
+        file when incremental is True.
+    """
+    if not isinstance(bracket_width, (int, float)) or bracket_width <= 0:
+        raise ValueError(f'{bracket_width = } must be a positive number')
+    if not isinstance(reseed_every, int) or reseed_every < 1:
+        raise ValueError(f'{reseed_every = } must be a positive integer')
+    _check_chunk_options(chunk_size, warm_start, cache)
+    iv_kwargs = {'date_field': date_field, 'exercise_price': exercise_price,
+                 'int_rate_field': int_rate_field, 'iv_field': iv_field,
+                 'maturity_field': maturity_field,
+                 'option_price_field': option_price_field,
+                 'option_type': option_type,
+                 'underlying_price_field': underlying_price_field,
+                 'strike_field': strike_field, 'type_field': type_field,
+                 'warm_start': warm_start, 'bracket_width': bracket_width,
+                 'reseed_every': reseed_every, 'chunk_size': chunk_size,
+                 'cache': cache, 'stats': stats}
+    lap = _stats_lap(stats)
+    if incremental:
+        solver_stats, _, _ = _append_iv(in_filename, out_filename,
+                                        buffer_size=buffer_size,
+                                        collect=False, iv_kwargs=iv_kwargs,
+                                        binary_filename=binary_filename)
+        # The plot of an incremental run covers the whole history, so it
+        # is drawn from the output file rather than the new rows.
+        if plot_filename is not None:
+            with _stats_phase(stats, 'plot'):
+                plot_iv_file(out_filename, plot_filename,
+                             date_field=date_field, iv_field=iv_field)
+    else:
+        solver_stats, dates, iv_values = _rewrite_iv(
+            in_filename, out_filename, buffer_size=buffer_size,
+            collect=plot_filename is not None, iv_kwargs=iv_kwargs,
+            binary_filename=binary_filename)
+        if plot_filename is not None:
+            with _stats_phase(stats, 'plot'):
+                plot_time_series_iv(dates, iv_values, plot_filename)
+    lap('time_series_iv')
+    return solver_stats
+
+
+def plot_time_series_iv(dates, iv_values, plot_filename, *, max_points=2000):
+    """
+    Save a plot of implied volatility against time to a file.
+
+    Matplotlib is only imported when a plot is drawn, and the headless
+    'Agg' backend is used unless pyplot has already been imported. Long
+    series are decimated before drawing by keeping the minimum and
+    maximum of each of max_points / 2 buckets, which keeps the shape
+    of the series at the resolution of the plot.
+
+    Parameters
+    ----------
+    dates : sequence of datetime or numpy.ndarray
+        The dates of the series.
+    iv_values : sequence of float or numpy.ndarray
+        The implied volatilities of the series (in %).
+    plot_filename : str
+        This is the filename of the plot, whose format is taken from its
+        extension (PNG by default).
+    max_points : int, optional
+        The maximum number of points drawn, which defaults to 2000.
+
+    Raises
+    ------
+    ValueError
+        If dates and iv_values are not the same length.
+        If max_points is not an integer of at least 2.
+    """
+    if not isinstance(max_points, int) or max_points < 2:
+        raise ValueError(f'{max_points = } must be an integer of at least 2')
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    iv_values = np.asarray(iv_values, dtype=float)
+    if dates.shape != iv_values.shape:
+        raise ValueError('dates and iv_values must be the same length')
+    dates, iv_values = _decimate(dates, iv_values, max_points // 2)
+
+    import matplotlib
+    if 'matplotlib.pyplot' not in sys.modules:
+        matplotlib.use('Agg')
+    import matplotlib.dates as pld
+    import matplotlib.pyplot as plt
+
+    # The following section explains the formation of the plot. This
+    # includes choosing the correct values for the axes, adjusting the
+    # x-axis (to at most about a dozen monthly ticks), and labelling the
+    # figure and axes.
+    fig, ax = plt.subplots()
+    ax.plot(dates, iv_values)
+    if dates.size > 0:
+        months = int((dates[-1] - dates[0]) / np.timedelta64(30, 'D'))
+        ax.xaxis.set_major_locator(pld.MonthLocator(
+            interval=max(1, months // 12 + 1)))
+        fig.autofmt_xdate()
+    ax.set_title('Volatility vs. Time')
+    ax.set_ylabel(r'$Implied\ volatility\ (\%)$')
+    ax.set_xlabel('$Time$')
+    fig.savefig(plot_filename)
+    plt.close(fig)
+
+
+def plot_iv_file(out_filename, plot_filename, *, date_field, iv_field,
+                 max_points=2000):
+    """
+    Save a plot of implied volatility against time from an output file.
+
+    Parameters
+    ----------
+    out_filename : str
+        This is the filename of a CSV file written by time_series_iv().
+    plot_filename : str
+        This is the filename of the plot.
+    date_field : str
+        This is the CSV field of the dates.
+    iv_field : str
+        This is the CSV field of the implied volatilities (as numbers,
+        not percentages).
+    max_points : int, optional
+        The maximum number of points drawn, which defaults to 2000.
+    """
+    with open(out_filename, 'r', newline='') as output_file:
+        reader = csv.reader(output_file)
+        headers = next(reader)
+        date_col = headers.index(date_field)
+        iv_col = headers.index(iv_field)
+        dates = []
+        iv_values = []
+        for chunk in iter(lambda: list(itertools.islice(reader, 65536)), []):
+            columns = list(zip(*chunk))
+            dates.append(parse_dates(columns[date_col]))
+            iv_values.append(np.array(columns[iv_col], dtype=float)*100)
+    if dates:
+        dates = np.concatenate(dates)
+        iv_values = np.concatenate(iv_values)
+    plot_time_series_iv(dates, iv_values, plot_filename,
+                        max_points=max_points)
+
+
+def _decimate(dates, iv_values, buckets):
+    """
+    Return the minimum and maximum points of each bucket of a series.
+
+    Parameters
+    ----------
+    dates, iv_values : numpy.ndarray
+        The series.
+    buckets : int
+        The number of (equally sized) buckets.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The dates and implied volatilities of the decimated series, in
+        their original order.
+    """
+    if iv_values.size <= 2*buckets:
+        return dates, iv_values
+    # nan values are left out of the minimum and maximum of each bucket.
+    values = np.where(np.isnan(iv_values), np.inf, iv_values)
+    edges = np.linspace(0, iv_values.size, buckets + 1).astype(int)
+    keep = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        low = start + np.argmin(values[start:end])
+        high = start + np.argmax(np.where(np.isinf(values[start:end]),
+                                          -np.inf, values[start:end]))
+        keep.extend(sorted({low, high}))
+    return dates[keep], iv_values[keep]
+
+
+def parallel_time_series_iv(in_filenames, out_filename=None, *,
+                            shard_bytes=None, processes=None, progress=None,
+                            buffer_size=2**20, **iv_kwargs):
+    """
+    Create new files with implied volatility from shards in parallel.
+
+    Each input file is split into shards, either whole files or byte
+    ranges of about shard_bytes split on line boundaries, and the
+    shards are processed by a pool of processes with the same method as
+    time_series_iv(). The shard outputs are either kept as separate
+    files or merged, in order, into a single output file. A shard that
+    fails does not stop the other shards.
+
+    Parameters
+    ----------
+    in_filenames : str or list of str
+        These are the filenames of the input CSV files. When merging,
+        these must all have the same headers.
+    out_filename : str, optional
+        This is the filename of the merged output CSV file. This
+        defaults to None, where each shard is written next to its input
+        file as '<name>_iv.csv', or '<name>_iv_<shard>.csv' if the file
+        is split into several shards.
+    shard_bytes : int, optional
+        This is the approximate size (in bytes) of each shard. This
+        defaults to None, where each file is a single shard. Fields must
+        not contain line breaks for files to be split.
+    processes : int, optional
+        This is the number of processes, which defaults to the number of
+        CPUs. If processes == 1, the shards are processed in this
+        process.
+    progress : function, optional
+        A function called with the result of each shard as soon as it
+        is finished.
+    buffer_size : int, optional
+        This is the size (in bytes) of the write buffer of the output
+        files, which defaults to 1 MiB.
+    **iv_kwargs : dict
+        The fields and options of time_series_iv(), such as date_field
+        and chunk_size. Warm-starting restarts at each shard.
+
+    Returns
+    -------
+    list of dict
+        The result of each shard, in order: its 'shard' number, its
+        'in_filename', the 'start' and 'end' of its byte range, its
+        'out_filename', the number of 'rows' and 'evaluations', the
+        'seconds' taken and the 'error' (None if the shard succeeded).
+        The rows of failed shards are missing from the merged output.
+
+    Raises
+    ------
+    ValueError
+        If the input files do not all have the same headers when
+        merging.
+        If shard_bytes is not a positive integer.
+        If warm_start or cache is given with chunk_size.
+    """
+    if isinstance(in_filenames, str):
+        in_filenames = [in_filenames]
+    _check_chunk_options(iv_kwargs.get('chunk_size'),
+                         iv_kwargs.get('warm_start', False),
+                         iv_kwargs.get('cache'))
+    if shard_bytes is not None and (not isinstance(shard_bytes, int)
+                                    or shard_bytes <= 0):
+        raise ValueError(f'{shard_bytes = } must be a positive integer')
+
+    # Splitting every file into shards, and naming the output of each.
+    shards = []
+    headers = None
+    for in_filename in in_filenames:
+        file_headers, offsets = _shard_offsets(in_filename, shard_bytes)
+        if out_filename is not None:
+            if headers is not None and file_headers != headers:
+                raise ValueError(f'{in_filename} must have the same headers '
+                                 'as the other input files.')
+            headers = file_headers
+        root, ext = os.path.splitext(in_filename)
+        for j, (start, end) in enumerate(offsets):
+            if out_filename is not None:
+                shard_filename = f'{out_filename}.shard{len(shards):05d}'
+            elif len(offsets) == 1:
+                shard_filename = f'{root}_iv{ext}'
+            else:
+                shard_filename = f'{root}_iv_{j:04d}{ext}'
+            shards.append({'shard': len(shards), 'in_filename': in_filename,
+                           'start': start, 'end': end,
+                           'out_filename': shard_filename})
+
+    # Processing the shards, and reporting each as it is finished. The
+    # shard outputs only have headers if they are kept.
+    write_header = out_filename is None
+    results = []
+    if processes == 1:
+        for shard in shards:
+            results.append(_process_iv_shard(shard, write_header, buffer_size,
+                                             iv_kwargs))
+            if progress is not None:
+                progress(results[-1])
+    else:
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            futures = [executor.submit(_process_iv_shard, shard,
+                                       write_header, buffer_size, iv_kwargs)
+                       for shard in shards]
+            for future in concurrent.futures.as_completed(futures):
+                results.append(future.result())
+                if progress is not None:
+                    progress(results[-1])
+    results.sort(key=lambda result: result['shard'])
+
+    # Merging the successful shards in order under a single header, and
+    # removing the shard outputs.
+    if out_filename is not None:
+        with open(out_filename, 'w', newline='',
+                  buffering=buffer_size) as output_file:
+            csv.writer(output_file).writerow(headers
+                                             + [iv_kwargs['iv_field']])
+            for result in results:
+                if result['error'] is None:
+                    with open(result['out_filename'], 'r',
+                              newline='') as shard_file:
+                        shutil.copyfileobj(shard_file, output_file)
+                if os.path.exists(result['out_filename']):
+                    os.remove(result['out_filename'])
+                result['out_filename'] = out_filename
+    return results
+
+
+def _rewrite_iv(in_filename, out_filename, *, buffer_size, collect,
+                iv_kwargs, binary_filename=None):
     """
-    # The following section opens the in_filename CSV file, splits the
-    # file by rows, strips of unwanted characters ('\r'), and creates a
+    Solve every row of the input file and rewrite the output file.
+
+    Parameters
+    ----------
+    in_filename, out_filename, buffer_size : str, str, int
+        The same parameters as time_series_iv().
+    collect : bool
+        Whether the dates and implied volatilities (in %) are returned
+        for the plot.
+    iv_kwargs : dict
+        The fields and options of time_series_iv().
+    binary_filename : str, optional
+        The same parameter as time_series_iv().
+
+    Returns
+    -------
+    tuple
+        The same as _write_iv().
+    """
+    # The following section opens the in_filename CSV file and creates a
     # DictReader object where the header fields of the CSV file become
-    # keys of a dictionary.
+    # keys of a dictionary. The file is streamed row by row, so it is
+    # never held in memory as a whole.
     with open(in_filename, 'r', newline='') as input_file:
         reader = csv.DictReader(input_file)
-        headers = reader.fieldnames
-
-        # The section below raises errors depending on whether
-        # certain fields are or are not headers in the CSV file.
-        if iv_field in headers:
-            raise Exception(
-                f'{iv_field} must not be a header within CSV file.')
-
-        required_fields = [date_field, int_rate_field, maturity_field,
-                           option_price_field, underlying_price_field]
-        for i, field in enumerate(required_fields):
-            if field not in headers:
-                field_names = ['date_field', 'int_rate_field',
-                               'maturity_field', 'option_price_field',
-                               'underlying_price_field']
-                raise ValueError(
-                    f'{field_names[i]} = {field} must be a header within CSV'
-                      ' file.')
+        _check_iv_fields(reader.fieldnames, **{field: iv_kwargs[field]
+                                               for field in _IV_FIELDS})
 
         # The following lines of code write a new out_filename CSV file,
-        # add an additional header 'iv_field', and Dictwriter() method
-        # is used to apply keys to the headers.
-        with open(out_filename, 'w', newline='') as output_file:
-            output_headers = headers + [iv_field]
-            writer = csv.DictWriter(output_file, fieldnames=output_headers)
-            writer.writeheader()
-
-            # The for loop runs through each row of data from the input
-            # file (reader) and places it within the black_scholes_iv
-            # function to find implied volatility. This is added under
-            # the new header 'iv_field' within the dictionary. Finally,
-            # each row of data is written into the new output file,
-            # including implied volatility.
-            for row in reader:
-                iv = black_scholes_iv(float(row[option_price_field]),
-                                      exercise_price=exercise_price,
-                                      interest_rate=float(row[int_rate_field])
-                                      / 100,
-                                      maturity_time=float(row[maturity_field])
-                                      / 365,
-                                      option_type=option_type,
-                                      underlying_price=float(
-                                      row[underlying_price_field]))
-                row[iv_field] = float(iv)
-                writer.writerow(row)
-
-        # After closing the output file that has been written in, the
-        # output file is reopened in read format. The output file is
-        # split into rows, stripped of unwanted characters ('\r'), and a
-        # new variable is created where the header fields of the output
-        # CSV file become keys of a dictionary.
-        with open(out_filename, 'r', newline='') as output_file:
-            output_rows = output_file.read().split('\n')
-            for i in range(len(output_rows)):
-                output_rows[i] = output_rows[i].replace('\r', '')
-            output_data = output_rows[1:]
-            output_reader = csv.DictReader(output_data,
-                                           fieldnames=output_headers)
-
-            # Initialising dates and iv_values as empty lists. These
-            # lists will contain the data required for the optional
-            # plot.
-            dates = []
-            iv_values = []
-            # An iteration of each row of the output_file, pulling
-            # through dates and implied volatilities and appending to
-            # the empty lists.
-            for row in output_reader:
-                dates.append(datetime.strptime(row[date_field], '%d%b%Y'))
-                iv_values.append(float(row[iv_field])*100)
+        # buffered by buffer_size bytes so that rows are written in large
+        # blocks, and the rows are solved and written by _write_iv().
+        with open(out_filename, 'w', newline='',
+                  buffering=buffer_size) as output_file, \
+                _IVColumnWriter(binary_filename) as binary:
+            return _write_iv(reader, output_file, reader.fieldnames,
+                             collect=collect, binary=binary, **iv_kwargs)
+
+
+def _append_iv(in_filename, out_filename, *, buffer_size, collect,
+               iv_kwargs, binary_filename=None):
+    """
+    Solve the rows appended to the input file since the last run.
+
+    The byte offset reached in the input file, the number of rows, and
+    the date and implied volatility of the last row are kept in the
+    JSON state file '<out_filename>.state'. Each run seeks past the
+    rows that have already been solved, appends the new rows to the
+    output file and then updates the state file. If there is no state
+    file (or no output file), every row is solved. The new rows are
+    always warm-started, with the first seeded by the last implied
+    volatility of the previous run.
+
+    Parameters
+    ----------
+    in_filename, out_filename, buffer_size : str, str, int
+        The same parameters as time_series_iv().
+    collect : bool
+        Whether the dates and implied volatilities (in %) are returned
+        for the plot.
+    iv_kwargs : dict
+        The fields and options of time_series_iv().
+    binary_filename : str, optional
+        The same parameter as time_series_iv(), which is appended to
+        like the output file.
+
+    Returns
+    -------
+    tuple
+        The same as _write_iv(), for the new rows only.
+
+    Raises
+    ------
+    ValueError
+        If the headers of the input file have changed, or the input
+        file is shorter than the offset in the state file, or the
+        binary file does not hold the rows of the previous runs.
+    """
+    state_filename = f'{out_filename}.state'
+    with open(in_filename, 'rb') as input_file:
+        headers = next(csv.reader([input_file.readline().decode()]), [])
+        _check_iv_fields(headers, **{field: iv_kwargs[field]
+                                     for field in _IV_FIELDS})
+        size = os.fstat(input_file.fileno()).st_size
+
+        # Loading the state of the last run, if there is one, and
+        # checking that it belongs to this input file.
+        state = None
+        if os.path.exists(state_filename) and os.path.exists(out_filename):
+            with open(state_filename, 'r') as state_file:
+                state = json.load(state_file)
+            if state['headers'] != headers or state['offset'] > size:
+                raise ValueError(f'{state_filename} does not match '
+                                 f'{in_filename}; delete it to solve every '
+                                 'row again.')
+        if state is None:
+            state = {'headers': headers, 'offset': input_file.tell(),
+                     'rows': 0, 'last_date': None, 'last_iv': None}
+
+        # Only the rows after the offset are read, and they are appended
+        # to the output file (which is created with headers if this is
+        # the first run).
+        reader = csv.DictReader(_read_lines(input_file, state['offset'],
+                                            size), fieldnames=headers)
+        first_run = state['rows'] == 0
+        with open(out_filename, 'w' if first_run else 'a', newline='',
+                  buffering=buffer_size) as output_file, \
+                _IVColumnWriter(binary_filename, None if first_run
+                                else state['rows']) as binary:
+            solver_stats, dates, iv_values = _write_iv(
+                reader, output_file, headers, write_header=first_run,
+                collect=collect, initial_iv=state['last_iv'],
+                binary=binary, **dict(iv_kwargs, warm_start=True))
+
+    # The state file is replaced in one step once the output file has been
+    # written, so that an interrupted run is simply repeated.
+    state['offset'] = size
+    state['rows'] += solver_stats['rows']
+    if solver_stats['rows'] > 0:
+        state['last_date'] = solver_stats['last_date']
+        state['last_iv'] = solver_stats['last_iv']
+    with open(f'{state_filename}.tmp', 'w') as state_file:
+        json.dump(state, state_file)
+    os.replace(f'{state_filename}.tmp', state_filename)
+    return solver_stats, dates, iv_values
+
+
+def _shard_offsets(in_filename, shard_bytes=None):
+    """
+    Return the headers and the byte ranges of the shards of a CSV file.
+
+    Parameters
+    ----------
+    in_filename : str
+        This is the filename of the input CSV file.
+    shard_bytes : int, optional
+        This is the approximate size (in bytes) of each shard, where the
+        end of each shard is moved forward to the next line boundary.
+        This defaults to None, where the whole file is a single shard.
+
+    Returns
+    -------
+    tuple
+        The headers of the file and a list of (start, end) byte
+        offsets, which together cover every row after the headers.
+    """
+    with open(in_filename, 'rb') as input_file:
+        headers = next(csv.reader([input_file.readline().decode()]), [])
+        start = input_file.tell()
+        size = os.fstat(input_file.fileno()).st_size
+        offsets = []
+        while start < size:
+            if shard_bytes is None or start + shard_bytes >= size:
+                end = size
+            else:
+                # Reading from the byte before the target, so that a
+                # target which is already at a line boundary is kept.
+                input_file.seek(start + shard_bytes - 1)
+                input_file.readline()
+                end = input_file.tell()
+            offsets.append((start, end))
+            start = end
+    return headers, offsets
+
+
+def _check_chunk_options(chunk_size, warm_start, cache):
+    """
+    Raise an error if options that columnar mode ignores are given.
+
+    Raises
+    ------
+    ValueError
+        If warm_start or cache is given with chunk_size.
+    """
+    if chunk_size is not None and (warm_start or cache is not None):
+        raise ValueError(f'warm_start and cache cannot be used with '
+                         f'{chunk_size = }')
+
+
+def _process_iv_shard(shard, write_header, buffer_size, iv_kwargs):
+    """
+    Solve and write the implied volatilities of one shard.
+
+    Parameters
+    ----------
+    shard : dict
+        The shard, as made by parallel_time_series_iv().
+    write_header : bool
+        Whether the headers are written to the shard output.
+    buffer_size : int
+        This is the size (in bytes) of the write buffer of the output.
+    iv_kwargs : dict
+        The fields and options of time_series_iv().
+
+    Returns
+    -------
+    dict
+        The result of the shard, as returned by
+        parallel_time_series_iv().
+    """
+    start_time = time.perf_counter()
+    result = dict(shard, rows=0, evaluations=0, seconds=0.0, error=None)
+    try:
+        with open(shard['in_filename'], 'rb') as input_file:
+            headers = next(csv.reader([input_file.readline().decode()]), [])
+            _check_iv_fields(headers, **{field: iv_kwargs.get(field)
+                                         for field in _IV_FIELDS})
+            reader = csv.DictReader(_read_lines(input_file, shard['start'],
+                                                shard['end']),
+                                    fieldnames=headers)
+            with open(shard['out_filename'], 'w', newline='',
+                      buffering=buffer_size) as output_file:
+                solver_stats, _, _ = _write_iv(reader, output_file, headers,
+                                               write_header=write_header,
+                                               **iv_kwargs)
+        result['rows'] = solver_stats['rows']
+        result['evaluations'] = solver_stats['evaluations']
+    # Any error is recorded against the shard rather than raised, so that
+    # the other shards carry on.
+    except Exception as error:
+        result['error'] = f'{type(error).__name__}: {error}'
+    result['seconds'] = time.perf_counter() - start_time
+    return result
+
+
+def _read_lines(input_file, start, end):
+    """
+    Yield the decoded lines of a binary file within a byte range.
+
+    Parameters
+    ----------
+    input_file : file object
+        The file, opened in binary mode.
+    start, end : int
+        The byte range, which must start and end on line boundaries.
+
+    Yields
+    ------
+    str
+        Each line of the byte range.
+    """
+    input_file.seek(start)
+    position = start
+    while position < end:
+        line = input_file.readline()
+        if not line:
+            break
+        position += len(line)
+        yield line.decode()
+
+
+_IV_FIELDS = ['date_field', 'exercise_price', 'int_rate_field', 'iv_field',
+              'maturity_field', 'option_price_field', 'option_type',
+              'underlying_price_field', 'strike_field', 'type_field']
+
+
+def _check_iv_fields(headers, *, date_field, exercise_price, int_rate_field,
+                     iv_field, maturity_field, option_price_field,
+                     option_type, underlying_price_field, strike_field,
+                     type_field):
+    """
+    Check the fields of time_series_iv() against the input headers.
+
+    Parameters
+    ----------
+    headers : list of str
+        The headers of the input file.
+    **fields
+        The same fields as time_series_iv().
+
+    Raises
+    ------
+    Error
+        If iv_field is a header in the input file.
+    ValueError
+        If any of the fields are not headers of the input file.
+        If not exactly one of exercise_price and strike_field, or of
+        option_type and type_field, is given.
+    """
+    if (exercise_price is None) == (strike_field is None):
+        raise ValueError('exactly one of exercise_price and strike_field '
+                         'must be given')
+    if (option_type is None) == (type_field is None):
+        raise ValueError('exactly one of option_type and type_field must be '
+                         'given')
+
+    # The section below raises errors depending on whether certain fields
+    # are or are not headers in the CSV file.
+    if iv_field in headers:
+        raise Exception(f'{iv_field} must not be a header within CSV file.')
 
-            # Raising an error if plot_filename is None and therefore the
-            # program not producing a plot.
-            if plot_filename is None:
-                raise Exception('plot_filename is None, Therefore program'
-                                'does not produce plot.')
+    required_fields = [date_field, int_rate_field, maturity_field,
+                       option_price_field, underlying_price_field,
+                       strike_field, type_field]
+    for i, field in enumerate(required_fields):
+        if field is not None and field not in headers:
+            field_names = ['date_field', 'int_rate_field', 'maturity_field',
+                           'option_price_field', 'underlying_price_field',
+                           'strike_field', 'type_field']
+            raise ValueError(
+                f'{field_names[i]} = {field} must be a header within CSV'
+                ' file.')
+
+
+def _write_iv(reader, output_file, headers, *, write_header=True,
+              collect=False, date_field, exercise_price=None, int_rate_field,
+              iv_field, maturity_field, option_price_field, option_type=None,
+              underlying_price_field, strike_field=None, type_field=None,
+              warm_start=False, bracket_width=0.05, reseed_every=100,
+              chunk_size=None, initial_iv=None, cache=None,
+              binary=None, stats=None):
+    """
+    Solve and write the implied volatilities of the rows of a reader.
+
+    Parameters
+    ----------
+    reader : csv.DictReader
+        The reader of the input rows.
+    output_file : file object
+        The output CSV file that the rows are written to.
+    headers : list of str
+        The headers of the input rows.
+    write_header : bool, optional
+        Whether the headers are written to the output file first, which
+        defaults to True.
+    collect : bool, optional
+        Whether the dates and implied volatilities (in %) are returned
+        for the plot, which defaults to False.
+    initial_iv : float, optional
+        The implied volatility that seeds the first warm-started solve,
+        such as the last implied volatility of a previous run. This
+        defaults to None, where the first row is solved cold.
+    binary : _IVColumnWriter, optional
+        The binary file that the dates and implied volatilities are
+        also written to, which defaults to None.
+    stats : PricingStats, optional
+        The same parameter as time_series_iv(), which defaults to None.
+    **fields
+        The same fields and options as time_series_iv().
+
+    Returns
+    -------
+    tuple
+        The solver statistics (as returned by time_series_iv()), and
+        the dates and implied volatilities (in %) if collect is True,
+        otherwise empty lists.
+
+    """
+    # The following lines of code add an additional header 'iv_field', and
+    # Dictwriter() method is used to apply keys to the headers.
+    output_headers = headers + [iv_field]
+    writer = csv.DictWriter(output_file, fieldnames=output_headers)
+    if write_header:
+        writer.writeheader()
+
+    # Initialising dates and iv_values as empty lists. These lists will
+    # contain the data required for the optional plot, and are only
+    # filled if collect is True.
+    dates = []
+    iv_values = []
+    last_date = None
+    last_iv = initial_iv
+
+    # In columnar mode, the remaining rows of the file are handed over in
+    # chunks to _write_iv_chunks().
+    if chunk_size is not None:
+        rows, evaluations, dates, iv_values, last_row = _write_iv_chunks(
+            reader.reader, writer.writer, headers, chunk_size=chunk_size,
+            collect=collect, date_field=date_field,
+            exercise_price=exercise_price, int_rate_field=int_rate_field,
+            maturity_field=maturity_field,
+            option_price_field=option_price_field, option_type=option_type,
+            underlying_price_field=underlying_price_field,
+            strike_field=strike_field, type_field=type_field,
+            binary=binary, stats=stats)
+        if last_row is not None:
+            last_date, last_iv = last_row
+        # Every row is solved over the full interval in columnar mode.
+        cold_solves = rows
+        cold_evaluations = evaluations
+        warm_solves = 0
+        warm_evaluations = 0
+    else:
+        # The for loop runs through each row of data from the input file
+        # (reader) and places it within the black_scholes_iv function to
+        # find implied volatility. This is added under the new header
+        # 'iv_field' within the dictionary. Finally, each row of data is
+        # written into the new output file, including implied volatility,
+        # and the plot series are collected in the same pass. When
+        # warm-starting, the previous implied volatility seeds the next
+        # row's solve, and the function evaluations of every solve are
+        # counted.
+        rows = 0
+        evaluations = 0
+        cold_solves = 0
+        cold_evaluations = 0
+        warm_solves = 0
+        warm_evaluations = 0
+        since_cold_solve = 0
+        lap = _stats_lap(stats)
+        for row in reader:
+            lap('read')
+            cold_solve = (not warm_start or last_iv is None
+                          or since_cold_solve >= reseed_every)
+            iv, row_evaluations = warm_start_iv(
+                float(row[option_price_field]),
+                None if cold_solve else last_iv,
+                bracket_width=bracket_width, cache=cache, stats=stats,
+                exercise_price=(exercise_price if strike_field is None
+                                else float(row[strike_field])),
+                interest_rate=float(row[int_rate_field]) / 100,
+                maturity_time=float(row[maturity_field]) / 365,
+                option_type=(option_type if type_field is None
+                             else row[type_field].strip().lower()),
+                underlying_price=float(row[underlying_price_field]))
+            lap('solve')
+            rows += 1
+            evaluations += row_evaluations
+            since_cold_solve += 1
+            if cold_solve:
+                since_cold_solve = 1
+                cold_solves += 1
+                cold_evaluations += row_evaluations
             else:
-                # The following section explains the formation of the plot.
-                # This includes choosing the correct values for the axes,
-                # adjusting the x-axis, and labelling the figure and axes.
-                fig, ax = plt.subplots()
-                ax.plot(dates, iv_values)
-                ax.xaxis.set_major_locator(pld.MonthLocator())
-                ax.set_title('Volatility vs. Time')
-                ax.set_ylabel(r'$Implied\ volatility\ (\%)$')
-                ax.set_xlabel('$Time$')
-    return
+                warm_solves += 1
+                warm_evaluations += row_evaluations
+            # Rows without an implied volatility are written as nan, as
+            # in columnar mode.
+            if iv is not None:
+                last_iv = float(iv)
+            last_date = row[date_field]
+            row[iv_field] = math.nan if iv is None else float(iv)
+            writer.writerow(row)
+            if binary is not None:
+                binary.append(row[date_field], row[iv_field])
+            if collect:
+                dates.append(datetime.strptime(row[date_field], '%d%b%Y'))
+                iv_values.append(row[iv_field]*100)
+            lap('write')
+
+    solver_stats = {'rows': rows, 'evaluations': evaluations,
+                    'cold_solves': cold_solves,
+                    'cold_evaluations': cold_evaluations,
+                    'warm_solves': warm_solves,
+                    'warm_evaluations': warm_evaluations,
+                    'last_date': last_date, 'last_iv': last_iv}
+    if stats is not None:
+        stats.count('rows', rows)
+        stats.count('evaluations', evaluations)
+    return solver_stats, dates, iv_values
+
+
+def _write_iv_chunks(reader, writer, headers, *, chunk_size, collect,
+                     date_field, exercise_price, int_rate_field,
+                     maturity_field, option_price_field, option_type,
+                     underlying_price_field, strike_field=None,
+                     type_field=None, binary=None, stats=None):
+    """
+    Solve and write the implied volatilities of a CSV file in chunks.
+
+    For option chains, the rows of each chunk are grouped by date and
+    maturity (together with the interest rate and price of the
+    underlying asset), the discount factor and forward price are
+    computed once per group, and the implied volatilities of all the
+    groups are solved in one batch.
+
+    Parameters
+    ----------
+    reader : csv.reader
+        The reader of the input file, positioned after the headers.
+    writer : csv.writer
+        The writer of the output file, positioned after the headers.
+    headers : list of str
+        The headers of the input file.
+    chunk_size : int
+        The number of rows read, solved and written at a time.
+    collect : bool
+        Whether the dates and implied volatilities (in %) are returned
+        for the plot.
+    binary : _IVColumnWriter, optional
+        The binary file that the dates and implied volatilities are
+        also written to, which defaults to None.
+    stats : PricingStats, optional
+        If given, the 'read', 'prepare', 'solve' and 'write' phases of
+        each chunk are timed, which defaults to None.
+    **fields
+        The same fields as time_series_iv().
+
+    Returns
+    -------
+    tuple
+        The number of rows, the number of evaluations of the
+        Black-Scholes formula, the arrays of dates and implied
+        volatilities (in %) if collect is True, otherwise empty lists,
+        and the date and implied volatility of the last row (None if
+        there are no rows).
+
+    Raises
+    ------
+    ValueError
+        If chunk_size is not a positive integer.
+    """
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        raise ValueError(f'{chunk_size = } must be a positive integer')
+
+    # The column index of each field is found once, rather than looking up
+    # every field of every row in a dictionary.
+    date_col = headers.index(date_field)
+    int_rate_col = headers.index(int_rate_field)
+    maturity_col = headers.index(maturity_field)
+    option_price_col = headers.index(option_price_field)
+    underlying_price_col = headers.index(underlying_price_field)
+    group_cols = [date_col, maturity_col, int_rate_col, underlying_price_col]
+
+    rows = 0
+    evaluations = 0
+    dates = []
+    iv_values = []
+    last_row = None
+    lap = _stats_lap(stats)
+    while True:
+        chunk = list(itertools.islice(reader, chunk_size))
+        lap('read')
+        if not chunk:
+            break
+        # Transposing the chunk into columns, which are then converted to
+        # typed arrays in one call each.
+        columns = list(zip(*chunk))
+        if strike_field is None:
+            strikes = np.full(len(chunk), float(exercise_price))
+        else:
+            strikes = np.array(columns[headers.index(strike_field)],
+                               dtype=float)
+        if type_field is None:
+            is_call = _parse_option_types(option_type, len(chunk))
+        else:
+            is_call = _parse_option_types(columns[headers.index(type_field)],
+                                          len(chunk))
+
+        # Finding the (date, maturity) groups of the chunk, and the first
+        # row and the group of each row. The discount factor and forward
+        # price are then computed once per group and broadcast back.
+        keys = np.array([columns[col] for col in group_cols]).T
+        _, first, group = np.unique(keys, axis=0, return_index=True,
+                                    return_inverse=True)
+        group = group.ravel()
+        group_rows = [chunk[i] for i in first]
+        interest_rate = np.array([row[int_rate_col] for row in group_rows],
+                                 dtype=float) / 100
+        maturity_time = np.array([row[maturity_col] for row in group_rows],
+                                 dtype=float) / 365
+        underlying_price = np.array([row[underlying_price_col]
+                                     for row in group_rows], dtype=float)
+        option_prices = np.array(columns[option_price_col], dtype=float)
+        for name, param in [('exercise_price', strikes),
+                            ('interest_rate', interest_rate),
+                            ('maturity_time', maturity_time),
+                            ('underlying_price', underlying_price)]:
+            if np.any(param <= 0):
+                raise ValueError(f'{name} must be positive')
+        discount_factor = np.exp(-interest_rate*maturity_time)
+        forward = underlying_price/discount_factor
+        lap('prepare')
+
+        iv, chunk_evaluations = _solve_iv_batch(
+            option_prices, forward[group], strikes, discount_factor[group],
+            maturity_time[group], is_call)
+        lap('solve')
+        rows += len(chunk)
+        evaluations += chunk_evaluations
+        last_row = (chunk[-1][date_col], float(iv[-1]))
+
+        # Each chunk is written out in one bulk operation.
+        writer.writerows([row + [str(value)]
+                          for row, value in zip(chunk, iv.tolist())])
+        if collect or binary is not None:
+            chunk_dates = parse_dates(columns[date_col])
+        if binary is not None:
+            binary.write(chunk_dates, iv)
+        if collect:
+            dates.append(chunk_dates)
+            iv_values.append(iv*100)
+        lap('write')
+
+    if collect and dates:
+        dates = np.concatenate(dates)
+        iv_values = np.concatenate(iv_values)
+    return rows, evaluations, dates, iv_values, last_row
+
+
+_IV_DTYPE = np.dtype([('date', '<i8'), ('iv', '<f8')])
+# The .npy header is written with a fixed length, so that it can be
+# rewritten in place with the final number of rows.
+_NPY_HEADER_LENGTH = 128
+
+
+class _IVColumnWriter:
+    """
+    A writer of dates and implied volatilities to a binary .npy file.
+
+    The file holds a one-dimensional structured array of _IV_DTYPE,
+    with dates as int64 days since 1970-01-01 and implied volatilities
+    as float64. The records are streamed to the file in blocks, and the
+    header (which holds the number of rows) is rewritten when the file
+    is closed. As a context manager, a writer without a filename is
+    None, so callers can skip it.
+
+    Parameters
+    ----------
+    filename : str or None
+        The filename of the .npy file.
+    rows : int, optional
+        If given, the file is appended to, and must already hold this
+        many rows. This defaults to None, where the file is created.
+    block_size : int, optional
+        The number of rows appended one at a time that are buffered
+        before being written, which defaults to 65536.
+
+    Raises
+    ------
+    ValueError
+        If the file that is appended to does not exist, is not a file
+        written by this class or does not hold rows rows.
+    """
+
+    def __init__(self, filename, rows=None, block_size=65536):
+        self.filename = filename
+        self.rows = 0 if rows is None else rows
+        self.block_size = block_size
+        self._file = None
+        self._dates = []
+        self._iv_values = []
+        if filename is None:
+            return
+        if rows is None:
+            self._file = open(filename, 'wb')
+            self._write_header()
+            return
+
+        # When appending, the header of the existing file is checked
+        # before the new records are added at its end.
+        if not os.path.exists(filename):
+            raise ValueError(f'{filename} must exist to be appended to; '
+                             'delete the state file to solve every row '
+                             'again.')
+        self._file = open(filename, 'r+b')
+        try:
+            if np.lib.format.read_magic(self._file) != (1, 0):
+                raise ValueError
+            shape, _, dtype = np.lib.format.read_array_header_1_0(
+                self._file)
+        except ValueError:
+            shape, dtype = None, None
+        if (self._file.tell() != _NPY_HEADER_LENGTH or dtype != _IV_DTYPE
+                or shape != (rows,)):
+            self._file.close()
+            raise ValueError(f'{filename} does not hold the {rows} rows of '
+                             'the previous runs; delete the state file to '
+                             'solve every row again.')
+        self._file.seek(0, os.SEEK_END)
+
+    def __enter__(self):
+        return None if self._file is None else self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_header(self):
+        # The header follows version 1.0 of the .npy format: the magic
+        # string, the length of the header, and a dictionary padded with
+        # spaces and ending in a newline.
+        header = repr({'descr': _IV_DTYPE.descr, 'fortran_order': False,
+                       'shape': (self.rows,)})
+        padding = _NPY_HEADER_LENGTH - 10 - len(header) - 1
+        self._file.seek(0)
+        self._file.write(b'\x93NUMPY\x01\x00'
+                         + struct.pack('<H', _NPY_HEADER_LENGTH - 10)
+                         + (header + ' '*padding + '\n').encode('latin1'))
+
+    def append(self, date_string, iv):
+        """
+        Append the date (in the '%d%b%Y' format) and implied volatility
+        of one row.
+        """
+        self._dates.append(date_string)
+        self._iv_values.append(iv)
+        if len(self._dates) >= self.block_size:
+            self.flush()
+
+    def write(self, dates, iv_values):
+        """
+        Write arrays of dates (as datetime64[D]) and implied
+        volatilities.
+        """
+        self.flush()
+        records = np.empty(len(iv_values), dtype=_IV_DTYPE)
+        records['date'] = np.asarray(dates, dtype='datetime64[D]').astype(
+            np.int64)
+        records['iv'] = iv_values
+        self._file.write(records.tobytes())
+        self.rows += len(records)
+
+    def flush(self):
+        """
+        Write the rows that have been appended one at a time.
+        """
+        if self._dates:
+            dates, self._dates = self._dates, []
+            iv_values, self._iv_values = self._iv_values, []
+            self.write(parse_dates(dates), iv_values)
+
+    def close(self):
+        """
+        Write any buffered rows and the final header, and close the file.
+        """
+        if self._file is None:
+            return
+        self.flush()
+        self._write_header()
+        self._file.close()
+        self._file = None
+
+
+def load_iv_columns(filename):
+    """
+    Return the dates and implied volatilities of a binary IV file.
+
+    The file, written with the binary_filename parameter of
+    time_series_iv(), is mapped into memory rather than read, so the
+    arrays are views of the file and are not copied or parsed.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the .npy file.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The dates as int64 days since 1970-01-01 (which can be viewed
+        as dates with .view('datetime64[D]')), and the implied
+        volatilities as float64 (not in %).
+    """
+    records = np.load(filename, mmap_mode='r')
+    return records['date'], records['iv']
+
+
+_MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP',
+           'OCT', 'NOV', 'DEC']
+# Each month abbreviation is encoded as an integer from its three
+# (uppercase) character codes, which are sorted for np.searchsorted().
+_MONTH_KEYS = np.array([ord(m[0])*65536 + ord(m[1])*256 + ord(m[2])
+                        for m in _MONTHS])
+_MONTH_ORDER = np.argsort(_MONTH_KEYS)
+_SORTED_MONTH_KEYS = _MONTH_KEYS[_MONTH_ORDER]
+
+
+def parse_dates(date_strings):
+    """
+    Return an array of dates parsed from the '%d%b%Y' format.
+
+    The dates are parsed all at once by reading the character codes of
+    the strings and looking up the month abbreviations in a table,
+    rather than calling datetime.strptime() on each date.
+
+    Parameters
+    ----------
+    date_strings : sequence of str
+        The dates, such as '03JAN2015'.
+
+    Returns
+    -------
+    numpy.ndarray
+        The dates as a datetime64[D] array.
+
+    Raises
+    ------
+    ValueError
+        If any of the dates are not in the '%d%b%Y' format.
+    """
+    date_strings = np.asarray(date_strings, dtype=str)
+    # Dates with a single-digit day are left to datetime.strptime().
+    if date_strings.size == 0 or np.any(np.char.str_len(date_strings) != 9):
+        return np.array([datetime.strptime(date, '%d%b%Y')
+                         for date in date_strings], dtype='datetime64[D]')
+
+    codes = date_strings.astype('U9').view(np.uint32).reshape(-1, 9)
+    digits = codes[:, [0, 1, 5, 6, 7, 8]].astype(np.int64) - ord('0')
+    if np.any((digits < 0) | (digits > 9)):
+        raise ValueError('dates must be in the %d%b%Y format')
+    day = digits[:, 0]*10 + digits[:, 1]
+    year = digits[:, 2]*1000 + digits[:, 3]*100 + digits[:, 4]*10 \
+        + digits[:, 5]
+
+    # Clearing the lowercase bit of the letters so that the month
+    # abbreviations are matched regardless of case.
+    letters = codes[:, 2:5].astype(np.int64) & ~32
+    keys = letters[:, 0]*65536 + letters[:, 1]*256 + letters[:, 2]
+    position = np.minimum(np.searchsorted(_SORTED_MONTH_KEYS, keys), 11)
+    if np.any(_SORTED_MONTH_KEYS[position] != keys):
+        raise ValueError('dates must be in the %d%b%Y format')
+    month = _MONTH_ORDER[position]
+
+    months = ((year - 1970)*12 + month).astype('datetime64[M]')
+    dates = months.astype('datetime64[D]') + (day - 1)
+    # Days beyond the end of the month roll into the next month, which
+    # is checked for.
+    if np.any((day < 1) | (dates.astype('datetime64[M]') != months)):
+        raise ValueError('dates must be in the %d%b%Y format')
+    return dates
+
+
+def _norm_cdf(x):
+    """Return the standard normal cumulative distribution of an array."""
+    return 0.5*_erfc(-np.asarray(x, dtype=float)/math.sqrt(2))
+
+
+# The coefficients of W. J. Cody's rational approximations of erf and erfc
+# (Math. Comp. 23, 1969), which are accurate to about 1e-16, for
+# |x| <= 0.5, 0.5 < |x| <= 4 and |x| > 4.
+_ERF_A = (3.16112374387056560e00, 1.13864154151050156e02,
+          3.77485237685302021e02, 3.20937758913846947e03,
+          1.85777706184603153e-1)
+_ERF_B = (2.36012909523441209e01, 2.44024637934444173e02,
+          1.28261652607737228e03, 2.84423683343917062e03)
+_ERF_C = (5.64188496988670089e-1, 8.88314979438837594e00,
+          6.61191906371416295e01, 2.98635138197400131e02,
+          8.81952221241769090e02, 1.71204761263407058e03,
+          2.05107837782607147e03, 1.23033935479799725e03,
+          2.15311535474403846e-8)
+_ERF_D = (1.57449261107098347e01, 1.17693950891312499e02,
+          5.37181101862009858e02, 1.62138957456669019e03,
+          3.29079923573345963e03, 4.36261909014324716e03,
+          3.43936767414372164e03, 1.23033935480374942e03)
+_ERF_P = (3.05326634961232344e-1, 3.60344899949804439e-1,
+          1.25781726111229246e-1, 1.60837851487422766e-2,
+          6.58749161529837803e-4, 1.63153871373020978e-2)
+_ERF_Q = (2.56852019228982242e00, 1.87295284992346725e00,
+          5.27905102951428412e-1, 6.05183413124413191e-2,
+          2.33520497626869185e-3)
+
+
+def _erfc(x):
+    """
+    Return the complementary error function of an array of floats.
+
+    This evaluates Cody's rational approximations with array operations,
+    so that no Python function is called for each element.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.abs(x)
+    result = np.empty_like(y)
+
+    # Near zero, erfc(x) = 1 - x*P(x**2)/Q(x**2).
+    small = y <= 0.46875
+    z = x[small]**2
+    numerator = _ERF_A[4]*z
+    denominator = z
+    for a, b in zip(_ERF_A[:3], _ERF_B[:3]):
+        numerator = (numerator + a)*z
+        denominator = (denominator + b)*z
+    result[small] = 1 - x[small]*(numerator + _ERF_A[3]) \
+        / (denominator + _ERF_B[3])
+
+    # Elsewhere, erfc(|x|) = exp(-x**2)*R(|x|), where exp(-x**2) is split
+    # into two factors to keep its accuracy for large |x|.
+    middle = ~small & (y <= 4)
+    z = y[middle]
+    numerator = _ERF_C[8]*z
+    denominator = z
+    for c, d in zip(_ERF_C[:7], _ERF_D[:7]):
+        numerator = (numerator + c)*z
+        denominator = (denominator + d)*z
+    result[middle] = (numerator + _ERF_C[7])/(denominator + _ERF_D[7])
+
+    # Beyond 26.543, erfc(|x|) underflows to zero.
+    large = (y > 4) & (y < 26.543)
+    z = 1/y[large]**2
+    numerator = _ERF_P[5]*z
+    denominator = z
+    for p, q in zip(_ERF_P[:4], _ERF_Q[:4]):
+        numerator = (numerator + p)*z
+        denominator = (denominator + q)*z
+    result[large] = (1/math.sqrt(math.pi) - z*(numerator + _ERF_P[4])
+                     / (denominator + _ERF_Q[4]))/y[large]
+
+    tail = middle | large
+    result[(y >= 26.543) | np.isnan(y)] = 0
+    result[np.isnan(y)] = np.nan
+    rounded = np.trunc(y[tail]*16)/16
+    result[tail] *= np.exp(-rounded*rounded) \
+        * np.exp(-(y[tail] - rounded)*(y[tail] + rounded))
+    # For negative x, erfc(x) = 2 - erfc(-x).
+    negative = ~small & (x < 0)
+    result[negative] = 2 - result[negative]
+    return result
+
+
+def _black_vectorized(forward, exercise_price, discount_factor,
+                      maturity_time, is_call, volatility):
+    """
+    Return the Black-Scholes prices and vegas of arrays of options.
+
+    The Black-Scholes formula is written in terms of the forward price
+    and the discount factor, so that these may be computed once and
+    shared by every option on the same date and maturity.
+
+    Parameters
+    ----------
+    forward : numpy.ndarray
+        The forward price of the underlying asset at maturity.
+    exercise_price : numpy.ndarray
+        The exercise prices of the options.
+    discount_factor : numpy.ndarray
+        The discount factors from maturity, exp(-interest_rate *
+        maturity_time).
+    maturity_time : numpy.ndarray
+        The (annualised) maturity times of the options.
+    is_call : numpy.ndarray
+        Boolean array, True for calls and False for puts.
+    volatility : numpy.ndarray
+        The volatilities of the underlying asset.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The option prices and vegas.
+    """
+    sqrt_time = np.sqrt(maturity_time)
+    d1 = (np.log(forward/exercise_price) + ((volatility**2)/2)*maturity_time) \
+        / (volatility*sqrt_time)
+    d2 = d1 - volatility*sqrt_time
+    # Using the put-call symmetry N(-x) = 1 - N(x) by flipping the sign of
+    # d1 and d2 for puts.
+    sign = np.where(is_call, 1.0, -1.0)
+    option_price = sign*discount_factor*(forward*_norm_cdf(sign*d1)
+                                         - exercise_price*_norm_cdf(sign*d2))
+    vega = discount_factor*forward*np.exp(-d1**2/2)/math.sqrt(2*math.pi) \
+        * sqrt_time
+    return option_price, vega
+
+
+def _parse_option_types(option_type, size):
+    """
+    Return a boolean array that is True for calls and False for puts.
+
+    Parameters
+    ----------
+    option_type : str or sequence of str
+        The type of every option, or the type of each option, either
+        'call' or 'put' (ignoring case and surrounding spaces).
+    size : int
+        The number of options.
+
+    Returns
+    -------
+    numpy.ndarray
+        The boolean array of calls.
+
+    Raises
+    ------
+    TypeError
+        If any of the option types are not either 'call' or 'put'.
+    """
+    if isinstance(option_type, str):
+        if option_type not in ['put', 'call']:
+            raise TypeError(f'{option_type=} must be either "put" or "call"')
+        return np.full(size, option_type == 'call')
+    option_type = np.char.lower(np.char.strip(np.asarray(option_type,
+                                                         dtype=str)))
+    is_call = option_type == 'call'
+    if np.any(~is_call & (option_type != 'put')):
+        raise TypeError('option types must be either "put" or "call"')
+    return is_call.ravel()
+
+
+GREEKS_DTYPE = np.dtype([('price', '<f8'), ('delta', '<f8'),
+                         ('gamma', '<f8'), ('vega', '<f8'),
+                         ('theta', '<f8'), ('rho', '<f8')])
+
+
+def black_scholes_greeks(exercise_price, interest_rate, maturity_time,
+                         option_type, underlying_price, volatility):
+    """
+    Return the prices and Greeks of arrays of European options.
+
+    The prices and the closed-form sensitivities are computed in one
+    pass, sharing d1, d2, the normal density and the discount factor,
+    rather than bumping each parameter and pricing again.
+
+    Parameters
+    ----------
+    exercise_price, interest_rate, maturity_time : float or numpy.ndarray
+        The same parameters as black_scholes(), for each option.
+    option_type : str or sequence of str
+        The type of every option, or the type of each option, either
+        'call' or 'put'.
+    underlying_price, volatility : float or numpy.ndarray
+        The same parameters as black_scholes(), for each option.
+
+    Returns
+    -------
+    numpy.ndarray
+        A structured array of GREEKS_DTYPE, with the shape of the
+        broadcast parameters, holding the 'price', 'delta', 'gamma',
+        'vega' (per unit of volatility), 'theta' (per year) and 'rho'
+        (per unit of interest rate) of each option.
+
+    Raises
+    ------
+    ValueError
+        If any of the parameters that take values are less than zero.
+    TypeError
+        If the parameter option_type is not either 'call' or 'put'
+    """
+    shape, val_parameters, is_call = _broadcast_parameters(
+        {'exercise_price': exercise_price, 'interest_rate': interest_rate,
+         'maturity_time': maturity_time,
+         'underlying_price': underlying_price, 'volatility': volatility},
+        option_type)
+    exercise_price = val_parameters['exercise_price']
+    interest_rate = val_parameters['interest_rate']
+    maturity_time = val_parameters['maturity_time']
+    underlying_price = val_parameters['underlying_price']
+    volatility = val_parameters['volatility']
+
+    # The shared terms: d1, d2, the normal density at d1, the discount
+    # factor and the normal distribution of d1 and d2, with their signs
+    # flipped for puts as in _black_vectorized().
+    sqrt_time = np.sqrt(maturity_time)
+    vol_time = volatility*sqrt_time
+    d1 = (np.log(underlying_price/exercise_price)
+          + (interest_rate + (volatility**2)/2)*maturity_time) / vol_time
+    d2 = d1 - vol_time
+    density = np.exp(-d1**2/2)/math.sqrt(2*math.pi)
+    discount_factor = np.exp(-interest_rate*maturity_time)
+    sign = np.where(is_call, 1.0, -1.0)
+    cdf_d1 = _norm_cdf(sign*d1)
+    discounted_cdf_d2 = exercise_price*discount_factor*_norm_cdf(sign*d2)
+
+    greeks = np.empty(math.prod(shape), dtype=GREEKS_DTYPE)
+    greeks['price'] = sign*(underlying_price*cdf_d1 - discounted_cdf_d2)
+    greeks['delta'] = sign*cdf_d1
+    greeks['gamma'] = density/(underlying_price*vol_time)
+    greeks['vega'] = underlying_price*density*sqrt_time
+    greeks['theta'] = -underlying_price*density*volatility/(2*sqrt_time) \
+        - sign*interest_rate*discounted_cdf_d2
+    greeks['rho'] = sign*maturity_time*discounted_cdf_d2
+    return greeks.reshape(shape)
+
+
+def black_scholes_prices(exercise_price, interest_rate, maturity_time,
+                         option_type, underlying_price, volatility):
+    """
+    Return the prices of arrays of European options.
+
+    These are the 'price' of black_scholes_greeks(), without the work
+    of the other Greeks.
+
+    Parameters
+    ----------
+    exercise_price, interest_rate, maturity_time : float or numpy.ndarray
+        The same parameters as black_scholes(), for each option.
+    option_type : str or sequence of str
+        The type of every option, or the type of each option, either
+        'call' or 'put'.
+    underlying_price, volatility : float or numpy.ndarray
+        The same parameters as black_scholes(), for each option.
+
+    Returns
+    -------
+    numpy.ndarray
+        The price of each option, with the shape of the broadcast
+        parameters.
+
+    Raises
+    ------
+    ValueError
+        If any of the parameters that take values are less than zero.
+    TypeError
+        If the parameter option_type is not either 'call' or 'put'
+    """
+    shape, val_parameters, is_call = _broadcast_parameters(
+        {'exercise_price': exercise_price, 'interest_rate': interest_rate,
+         'maturity_time': maturity_time,
+         'underlying_price': underlying_price, 'volatility': volatility},
+        option_type)
+    exercise_price = val_parameters['exercise_price']
+    interest_rate = val_parameters['interest_rate']
+    maturity_time = val_parameters['maturity_time']
+    underlying_price = val_parameters['underlying_price']
+    volatility = val_parameters['volatility']
+
+    # The same operations as the price in black_scholes_greeks(), so the
+    # prices are exactly the same.
+    vol_time = volatility*np.sqrt(maturity_time)
+    d1 = (np.log(underlying_price/exercise_price)
+          + (interest_rate + (volatility**2)/2)*maturity_time) / vol_time
+    d2 = d1 - vol_time
+    discount_factor = np.exp(-interest_rate*maturity_time)
+    sign = np.where(is_call, 1.0, -1.0)
+    price = sign*(underlying_price*_norm_cdf(sign*d1)
+                  - exercise_price*discount_factor*_norm_cdf(sign*d2))
+    return price.reshape(shape)
+
+
+def _broadcast_parameters(val_parameters, option_type):
+    """
+    Return the flattened parameters of arrays of European options.
+
+    Parameters
+    ----------
+    val_parameters : dict
+        The parameters that take values, each a float or numpy.ndarray.
+    option_type : str or sequence of str
+        The type of every option, or the type of each option.
+
+    Returns
+    -------
+    tuple
+        The shape of the broadcast parameters, the dict of the flattened
+        parameters that take values, and the boolean array of calls.
+
+    Raises
+    ------
+    ValueError
+        If any of the parameters that take values are less than zero.
+    TypeError
+        If the parameter option_type is not either 'call' or 'put'
+    """
+    shape = np.broadcast_shapes(*(np.shape(param)
+                                  for param in val_parameters.values()),
+                                np.shape(option_type)
+                                if not isinstance(option_type, str) else ())
+    flattened = {}
+    for name, param in val_parameters.items():
+        param = np.broadcast_to(np.asarray(param, dtype=float), shape)
+        if np.any(param <= 0):
+            raise ValueError(f'{name} must be positive')
+        flattened[name] = param.ravel()
+    if not isinstance(option_type, str):
+        option_type = np.broadcast_to(np.asarray(option_type, dtype=str),
+                                      shape)
+    return shape, flattened, _parse_option_types(option_type,
+                                                 math.prod(shape))
+
+
+def black_scholes_iv_batch(option_prices, *, lower_vol=0.0001, upper_vol=100,
+                           tol=10**-9, max_iter=100, exercise_price,
+                           interest_rate, maturity_time, option_type,
+                           underlying_price):
+    """
+    Return the implied volatilities of an array of European options.
+
+    Parameters
+    ----------
+    option_prices : numpy.ndarray
+        The market's view of the prices of the options.
+    lower_vol : float, optional
+        This is the lower bound of the implied volatility interval.
+    upper_vol : float, optional
+        This is the upper bound of the implied volatility interval.
+    tol : float, optional
+        Tolerance of the difference between the Black-Scholes price and
+        the option price, which defaults to 10^(-9).
+    max_iter : int, optional
+        The maximum number of iterations, which defaults to 100.
+    exercise_price, interest_rate, maturity_time : float or numpy.ndarray
+        The same parameters as black_scholes(), for each option.
+    option_type : str or sequence of str
+        The type of every option, or the type of each option, either
+        'call' or 'put'.
+    underlying_price : float or numpy.ndarray
+        The same parameter as black_scholes(), for each option.
+
+    Returns
+    -------
+    tuple
+        The array of implied volatilities (nan where there is no root
+        within the interval) and the number of evaluations of the
+        Black-Scholes formula.
+
+    Raises
+    ------
+    ValueError
+        If any of the parameters that take values are less than zero.
+    TypeError
+        If the parameter option_type is not either 'call' or 'put'
+    """
+    option_prices = np.asarray(option_prices, dtype=float)
+    shape = option_prices.shape
+    val_parameters = {'exercise_price': exercise_price,
+                      'interest_rate': interest_rate,
+                      'maturity_time': maturity_time,
+                      'underlying_price': underlying_price}
+    for name, param in val_parameters.items():
+        param = np.broadcast_to(np.asarray(param, dtype=float), shape)
+        if np.any(param <= 0):
+            raise ValueError(f'{name} must be positive')
+        val_parameters[name] = param.ravel()
+    is_call = _parse_option_types(option_type, option_prices.size)
+
+    discount_factor = np.exp(-val_parameters['interest_rate']
+                             * val_parameters['maturity_time'])
+    iv, evaluations = _solve_iv_batch(
+        option_prices.ravel(),
+        val_parameters['underlying_price']/discount_factor,
+        val_parameters['exercise_price'], discount_factor,
+        val_parameters['maturity_time'], is_call, lower_vol=lower_vol,
+        upper_vol=upper_vol, tol=tol, max_iter=max_iter)
+    return iv.reshape(shape), evaluations
+
+
+def _solve_iv_batch(option_prices, forward, exercise_price, discount_factor,
+                    maturity_time, is_call, *, lower_vol=0.0001,
+                    upper_vol=100, tol=10**-9, max_iter=100):
+    """
+    Return the implied volatilities of arrays of options in one batch.
+
+    All of the implied volatilities are solved together with a
+    safeguarded Newton method: a Newton step is taken where it stays
+    within the bracket of each option, and the bracket is bisected
+    (geometrically) otherwise.
+
+    Parameters
+    ----------
+    option_prices : numpy.ndarray
+        The market's view of the prices of the options.
+    forward, exercise_price, discount_factor : numpy.ndarray
+        The same parameters as _black_vectorized(), for each option.
+    maturity_time, is_call : numpy.ndarray
+        The same parameters as _black_vectorized(), for each option.
+    lower_vol, upper_vol, tol, max_iter : float, optional
+        The same parameters as black_scholes_iv_batch().
+
+    Returns
+    -------
+    tuple
+        The array of implied volatilities (nan where there is no root
+        within the interval) and the number of evaluations of the
+        Black-Scholes formula.
+    """
+    def f(index, vol):
+        price, vega = _black_vectorized(forward[index],
+                                        exercise_price[index],
+                                        discount_factor[index],
+                                        maturity_time[index], is_call[index],
+                                        vol)
+        return price - option_prices[index], vega
+
+    # Checking which options have a root within the interval, since the
+    # Black-Scholes price is increasing in the volatility.
+    everything = np.arange(option_prices.size)
+    lower = np.full(option_prices.size, float(lower_vol))
+    upper = np.full(option_prices.size, float(upper_vol))
+    f_lower, _ = f(everything, lower)
+    f_upper, _ = f(everything, upper)
+    evaluations = 2*option_prices.size
+    iv = np.full(option_prices.size, np.nan)
+    iv[np.abs(f_lower) <= tol] = lower_vol
+    iv[np.abs(f_upper) <= tol] = upper_vol
+    active = everything[np.isnan(iv) & (f_lower < 0) & (f_upper > 0)]
+
+    # The initial guess is the Brenner-Subrahmanyam approximation, kept
+    # within the interval.
+    vol = np.clip(np.sqrt(2*math.pi/maturity_time[active])
+                  * option_prices[active]
+                  / (discount_factor[active]*forward[active]),
+                  lower_vol, upper_vol)
+    for i in range(max_iter):
+        if active.size == 0:
+            break
+        diff, vega = f(active, vol)
+        evaluations += active.size
+        converged = np.abs(diff) <= tol
+        iv[active[converged]] = vol[converged]
+
+        # Narrowing the bracket and taking the Newton step if it lies
+        # strictly within it, otherwise bisecting.
+        lower[active] = np.where(diff < 0, vol, lower[active])
+        upper[active] = np.where(diff > 0, vol, upper[active])
+        with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+            newton = vol - diff/vega
+        bisection = np.sqrt(lower[active]*upper[active])
+        inside = (newton > lower[active]) & (newton < upper[active])
+        vol = np.where(inside, newton, bisection)
+
+        # Options whose bracket can no longer be narrowed are treated as
+        # solved, in the same way as find_root().
+        stalled = ~converged & ((vol == lower[active])
+                                | (vol == upper[active]))
+        iv[active[stalled]] = vol[stalled]
+        keep = ~converged & ~stalled
+        active = active[keep]
+        vol = vol[keep]
+    iv[active] = vol
+    return iv, evaluations
 
 
 def black_scholes_iv(option_price, *, lower_vol=0.0001, upper_vol=100,
-                     **k_args):
+                     cache=None, stats=None, **k_args):
     """
     Return the implied volatility of a European option.
 
@@ -259,6 +1867,12 @@ def black_scholes_iv(option_price, *, lower_vol=0.0001, upper_vol=100,
         This is the lower bound of the implied volatility interval.
     upper_vol : float, optional
         This is the lower bound of the implied volatility interval.
+    cache : QuoteCache, optional
+        If given, the implied volatility is looked up in (and otherwise
+        added to) the cache. This defaults to None.
+    stats : PricingStats, optional
+        If given, the function evaluations and the calls and iterations
+        of find_root() are counted. This defaults to None.
     **k_args : dict
         Additonal parameters required for the black-scholes function
         where the values of these parameters are taken from the CSV
@@ -269,11 +1883,393 @@ def black_scholes_iv(option_price, *, lower_vol=0.0001, upper_vol=100,
     float
         the implied volatility of the european option.
     """
-    return find_root(lambda vol: black_scholes(**k_args, volatility=vol)
-                     - option_price, lower_vol, upper_vol)
+    if cache is not None:
+        return cache.lookup(_iv_key(option_price, lower_vol, upper_vol,
+                                    k_args),
+                            lambda: black_scholes_iv(option_price,
+                                                     lower_vol=lower_vol,
+                                                     upper_vol=upper_vol,
+                                                     stats=stats, **k_args))
+    if stats is None:
+        return find_root(lambda vol: black_scholes(**k_args, volatility=vol)
+                         - option_price, lower_vol, upper_vol)
+    f = _CountedFunction(lambda vol: black_scholes(**k_args, volatility=vol)
+                         - option_price)
+    iv = find_root(f, lower_vol, upper_vol, stats=stats)
+    stats.count('evaluations', f.evaluations)
+    return iv
+
+
+def warm_start_iv(option_price, previous_iv=None, *, lower_vol=0.0001,
+                  upper_vol=100, bracket_width=0.05, cache=None, stats=None,
+                  **k_args):
+    """
+    Return the implied volatility and the number of evaluations used.
+
+    The root is first searched for within a tight bracket around the
+    previous implied volatility. If the bracket does not contain a
+    root, its width is quadrupled until it does, or until it reaches
+    the full interval [lower_vol, upper_vol].
+
+    Parameters
+    ----------
+    option_price : float
+        This is the market's view of the price of the option.
+    previous_iv : float, optional
+        This is the implied volatility used to seed the bracket, such
+        as the previous row's implied volatility. This defaults to
+        None, where the full interval is searched.
+    lower_vol : float, optional
+        This is the lower bound of the implied volatility interval.
+    upper_vol : float, optional
+        This is the upper bound of the implied volatility interval.
+    bracket_width : float, optional
+        This is the initial relative half-width of the bracket, such
+        that the bracket is [previous_iv / (1 + bracket_width),
+        previous_iv * (1 + bracket_width)].
+    cache : QuoteCache, optional
+        If given, the implied volatility is looked up in (and otherwise
+        added to) the cache, where a hit costs no evaluations. This
+        defaults to None.
+    stats : PricingStats, optional
+        If given, the cache hits and the calls and iterations of
+        find_root() are counted. This defaults to None.
+    **k_args : dict
+        Additonal parameters required for the black-scholes function.
+
+    Returns
+    -------
+    tuple
+        The implied volatility (otherwise None) and the number of
+        evaluations of the Black-Scholes formula.
+
+    Raises
+    ------
+    ValueError
+        If bracket_width is not a positive number.
+    """
+    if not isinstance(bracket_width, (int, float)) or bracket_width <= 0:
+        raise ValueError(f'{bracket_width = } must be a positive number')
+    if cache is not None:
+        key = _iv_key(option_price, lower_vol, upper_vol, k_args)
+        iv = cache.get(key, _MISSING)
+        if iv is not _MISSING:
+            if stats is not None:
+                stats.count('cache_hits')
+            return iv, 0
+        iv, evaluations = warm_start_iv(option_price, previous_iv,
+                                        lower_vol=lower_vol,
+                                        upper_vol=upper_vol,
+                                        bracket_width=bracket_width,
+                                        stats=stats, **k_args)
+        cache.put(key, iv)
+        return iv, evaluations
+
+    f = _CountedFunction(lambda vol: black_scholes(**k_args, volatility=vol)
+                         - option_price)
+    if previous_iv is None:
+        return find_root(f, lower_vol, upper_vol, stats=stats), f.evaluations
+
+    width = bracket_width
+    while True:
+        lower = max(lower_vol, previous_iv / (1 + width))
+        upper = min(upper_vol, previous_iv * (1 + width))
+        # Solving within the bracket once it contains a sign change, or
+        # once it has been widened to the full interval.
+        if f(lower)*f(upper) <= 0 or (lower == lower_vol
+                                      and upper == upper_vol):
+            return find_root(f, lower, upper, stats=stats), f.evaluations
+        width *= 4
+
+
+def _iv_key(option_price, lower_vol, upper_vol, k_args):
+    """Return the QuoteCache key of an implied volatility."""
+    return ('iv', option_price, lower_vol, upper_vol) \
+        + tuple(itertools.chain.from_iterable(sorted(k_args.items())))
+
+
+_MISSING = object()
+
+
+class QuoteCache:
+    """A bounded, thread-safe LRU cache of option prices and volatilities.
+
+    Keys are tuples of the inputs of a calculation, where numbers are
+    quantized to multiples of the tolerance, so that repeated quotes
+    (stale quotes, duplicated rows, re-sent snapshots) cost a dictionary
+    lookup rather than a new calculation. Once the cache is full, the
+    least recently used entry is evicted.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The maximum number of entries, which defaults to 100000.
+    tolerance : float, optional
+        The (absolute) tolerance that numbers in the keys are quantized
+        to, which defaults to 10^(-10).
+
+    Attributes
+    ----------
+    maxsize : int
+        The maximum number of entries.
+    tolerance : float
+        The tolerance that numbers in the keys are quantized to.
+    hits : int
+        The number of lookups that found an entry.
+    misses : int
+        The number of lookups that did not find an entry.
+    evictions : int
+        The number of entries evicted.
+
+    Raises
+    ------
+    ValueError
+        If maxsize is not a positive integer.
+        If tolerance is not a positive number.
+    """
+
+    def __init__(self, maxsize=100000, tolerance=10**-10):
+        # Initialise instance variables
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Check variables and raise appropiate errors
+        if not isinstance(maxsize, int) or maxsize <= 0:
+            raise ValueError(f'{maxsize = } must be a positive integer')
+        if not isinstance(tolerance, (int, float)) or tolerance <= 0:
+            raise ValueError(f'{tolerance = } must be a positive number')
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # The lock cannot be pickled, so each process that receives a
+        # copy of the cache (e.g. a parallel_time_series_iv() worker)
+        # makes its own.
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def key(self, values):
+        """Return the tuple of values with numbers quantized.
+
+        Parameters
+        ----------
+        values : tuple
+            The inputs of a calculation.
+
+        Returns
+        -------
+        tuple
+            The key of the cache.
+        """
+        return tuple(round(value / self.tolerance)
+                     if isinstance(value, (int, float))
+                     and not isinstance(value, bool) else value
+                     for value in values)
+
+    def get(self, values, default=None):
+        """Return the cached result of the values, otherwise default.
+
+        Parameters
+        ----------
+        values : tuple
+            The inputs of a calculation.
+        default : object, optional
+            The value returned if there is no entry, which defaults to
+            None.
+
+        Returns
+        -------
+        object
+            The cached result, otherwise default.
+        """
+        key = self.key(values)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, values, result):
+        """Add the result of the values, evicting the oldest if full.
+
+        Parameters
+        ----------
+        values : tuple
+            The inputs of a calculation.
+        result : object
+            The result of the calculation.
+        """
+        key = self.key(values)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def lookup(self, values, calculate):
+        """Return the cached result of the values, calculating on a miss.
+
+        Parameters
+        ----------
+        values : tuple
+            The inputs of a calculation.
+        calculate : function
+            A function with no parameters that returns the result. It is
+            called outside the lock, so concurrent misses on the same
+            key may each calculate the result.
+
+        Returns
+        -------
+        object
+            The result of the calculation.
+        """
+        result = self.get(values, _MISSING)
+        if result is _MISSING:
+            result = calculate()
+            self.put(values, result)
+        return result
+
+    def stats(self):
+        """Return the counters of the cache.
+
+        Returns
+        -------
+        dict
+            The number of 'hits', 'misses', 'evictions' and the current
+            'size' of the cache.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'size': len(self._entries)}
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+# The projects are standalone scripts, so PricingStats and its helpers are
+# defined here as well as in the Bermudan option pricing model (as find_root
+# is here and in the approximate root project), rather than loading that
+# whole script on every import. The two copies are kept the same.
+class PricingStats:
+    """Opt-in counters, phase timers and hooks of the pricers.
+
+    An instance is passed as the stats parameter of a pricer, which then
+    counts its work (such as nodes built or function evaluations) and times
+    its phases. Without it, the pricers skip all of this.
+
+    Attributes
+    ----------
+    counters : dict
+        The number of each counted event.
+    timings : dict
+        The total time (in seconds) spent in each phase.
+    calls : dict
+        The number of times each phase was timed.
+    hooks : list of function
+        Functions called with the name and time (in seconds) of each phase
+        as soon as it ends.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.timings = {}
+        self.calls = {}
+        self.hooks = []
+
+    def count(self, name, n=1):
+        """Add n to the counter of name."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name, seconds):
+        """Add the time of one phase of name, and call the hooks."""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        for hook in self.hooks:
+            hook(name, seconds)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the body of a with statement as a phase of name."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start_time)
+
+    def add_hook(self, hook):
+        """Add a function called with the name and time of each phase."""
+        self.hooks.append(hook)
+
+    def as_dict(self):
+        """Return copies of the counters, timings and calls of the phases."""
+        return {'counters': dict(self.counters),
+                'timings': dict(self.timings), 'calls': dict(self.calls)}
+
+    def reset(self):
+        """Set every counter and timing back to zero, keeping the hooks."""
+        self.counters.clear()
+        self.timings.clear()
+        self.calls.clear()
+
+
+def _stats_phase(stats, name):
+    """Return the phase timer of stats, or a null context without stats."""
+    return contextlib.nullcontext() if stats is None else stats.phase(name)
+
+
+def _stats_lap(stats):
+    """Return a lap timer of stats, or a function that does nothing.
+
+    Each call lap(name) of the timer adds the time since the previous call
+    (or since the timer was made) as a phase of name.
+    """
+    if stats is None:
+        return _no_lap
+    mark = [time.perf_counter()]
+
+    def lap(name):
+        now = time.perf_counter()
+        stats.add_time(name, now - mark[0])
+        mark[0] = now
+    return lap
+
+
+def _no_lap(name):
+    pass
+
+
+class _CountedFunction:
+    """A function wrapper that counts the number of evaluations."""
+
+    def __init__(self, f):
+        self.f = f
+        self.evaluations = 0
+
+    def __call__(self, x):
+        self.evaluations += 1
+        return self.f(x)
 
 
-def find_root(f, a, b, tol=10**-9, max_iter=math.inf):
+def find_root(f, a, b, tol=10**-9, max_iter=math.inf, stats=None):
     """
     Return an approximate root of a give function, f.
 
@@ -292,12 +2288,17 @@ def find_root(f, a, b, tol=10**-9, max_iter=math.inf):
         therefore assumed to be non-negative.
     max_iter : float, optional
         The maximum number of iterations which defaults to infinity.
+    stats : PricingStats, optional
+        If given, the calls and iterations are counted. This defaults
+        to None.
 
     Returns
     -------
     float
         Value of the approximate root, otherwise None.
     """
+    if stats is not None:
+        stats.count('find_root_calls')
     # Checking whether a or b are already an approximate root of f.
     if abs(f(a)) <= tol:
         return a
@@ -317,6 +2318,8 @@ def find_root(f, a, b, tol=10**-9, max_iter=math.inf):
     i = 0
     while i < max_iter:
         i += 1
+        if stats is not None:
+            stats.count('find_root_iterations')
         # Defining y has the iterative formula to calculate the next
         # approximate root of f
         y = (x_negative * f(x_positive) - x_positive *